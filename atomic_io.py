@@ -0,0 +1,22 @@
+import json
+import os
+
+
+def write_atomic(path, data):
+    """
+    先写临时文件再整体替换，正在运行的应用不会读到写了一半的文件
+    临时文件名带进程号，多个进程同时写同一个文件时不会互相覆盖临时文件
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_json_atomic(path, data, indent=None):
+    """把 data 保存为 JSON 文件（中文不转义），写入方式同 write_atomic"""
+    write_atomic(path, json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8"))
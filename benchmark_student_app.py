@@ -0,0 +1,211 @@
+import functools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic_data import student_csv, student_csv_path
+
+# 默认的数据规模（行数），可用 --sizes 50000,500000 覆盖
+DEFAULT_SIZES = [50_000, 500_000, 5_000_000, 50_000_000]
+DEFAULT_OUTPUT = os.path.join("benchmark_results", "student_app.json")
+# 合成数据的存放目录，同样的行数只生成一次
+BENCH_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench_data")
+# 单个规模的超时时间（秒），超时视为应用在该规模下不可用
+CHILD_TIMEOUT = 3600
+
+RAW_COLS = [
+    "学号", "性别", "专业", "每周学习时长（小时）",
+    "上课出勤率", "期中考试分数", "作业完成率", "期末考试分数"
+]
+
+
+def timed(func, *args, **kwargs):
+    """执行函数，返回 (结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, round(time.perf_counter() - start, 4)
+
+
+def run_stages(csv_path):
+    """在当前进程中分别测量数据加载、汇总计算各阶段的耗时"""
+    from columnar_cache import load_snapshot_with_meta
+    from student_aggregates import MajorAggregates, major_distributions
+    from student_data import SNAPSHOT_KEY, read_student_csv
+
+    stages = {}
+    _, stages["parse_csv_s"] = timed(read_student_csv, csv_path)
+    (df, meta), stages["snapshot_build_s"] = timed(
+        load_snapshot_with_meta, csv_path, read_student_csv, columns=RAW_COLS, key=SNAPSHOT_KEY
+    )
+    (df, meta), stages["snapshot_read_s"] = timed(
+        load_snapshot_with_meta, csv_path, read_student_csv, columns=RAW_COLS, key=SNAPSHOT_KEY
+    )
+    aggregates, stages["major_aggregates_s"] = timed(MajorAggregates.from_frame, csv_path, df, meta["size"])
+    _, stages["major_df_s"] = timed(aggregates.major_df)
+    _, stages["refresh_no_change_s"] = timed(aggregates.refresh)
+    _, stages["major_distributions_s"] = timed(major_distributions, df)
+    stages["frame_memory_mb"] = round(df.memory_usage(deep=True).sum() / 1024 ** 2, 2)
+    return stages
+
+
+def record_page_timings(cached_s, chart_s):
+    """
+    在 AppTest 运行应用之前替换 Streamlit 的函数，记录页面内部各步骤的耗时（只在基准测试的子进程中替换）
+    - st.cache_resource / st.cache_data：被缓存的函数第一次实际执行（缓存未命中）的耗时，按函数名记录
+    - st.plotly_chart：每个图表序列化后发送到页面的耗时，按图表标题记录
+    """
+    import streamlit as st
+
+    def timing_cache(cache):
+        def decorator(func=None, **kwargs):
+            if func is None:
+                return lambda f: decorator(f, **kwargs)
+
+            # functools.wraps 保留原函数的名称、签名和源码，Streamlit 的缓存键不受影响
+            @functools.wraps(func)
+            def wrapper(*args, **kw):
+                result, seconds = timed(func, *args, **kw)
+                cached_s.setdefault(func.__name__, seconds)
+                return result
+
+            return cache(wrapper, **kwargs)
+        return decorator
+
+    def timing_plotly_chart(plotly_chart):
+        @functools.wraps(plotly_chart)
+        def wrapper(figure, *args, **kwargs):
+            result, seconds = timed(plotly_chart, figure, *args, **kwargs)
+            chart_s.setdefault(figure.layout.title.text, seconds)
+            return result
+        return wrapper
+
+    st.cache_resource = timing_cache(st.cache_resource)
+    st.cache_data = timing_cache(st.cache_data)
+    st.plotly_chart = timing_plotly_chart(st.plotly_chart)
+
+
+def run_app(app_path):
+    """用 Streamlit 的 AppTest 无界面地运行应用，测量数据加载、每个图表和预测提交的耗时"""
+    from streamlit.testing.v1 import AppTest
+
+    app = {}
+    cached_s, chart_s = {}, {}
+    record_page_timings(cached_s, chart_s)
+    at = AppTest.from_file(app_path, default_timeout=CHILD_TIMEOUT)
+    _, app["first_run_s"] = timed(at.run)
+
+    at.sidebar.radio[0].set_value("专业数据分析")
+    _, app["analysis_page_first_s"] = timed(at.run)
+    _, app["analysis_page_rerun_s"] = timed(at.run)
+    app["chart_spec_bytes"] = [len(chart.proto.spec) for chart in at.get("plotly_chart")]
+    # 专业数据分析页面：数据加载、汇总和图表构建（缓存未命中时）的耗时，以及每个图表发送到页面的耗时
+    app["load_real_data_s"] = cached_s.get("load_real_data")
+    app["page_build_s"] = {
+        name: seconds for name, seconds in cached_s.items()
+        if name in ("load_major_aggregates", "build_major_figures", "load_major_distributions", "build_drilldown_figures")
+    }
+    app["chart_render_s"] = dict(chart_s)
+
+    at.sidebar.radio[0].set_value("成绩预测").run()
+    at.text_input[0].set_value("2023000001")
+    at.selectbox[0].set_value("男")
+    at.selectbox[1].set_value(at.selectbox[1].options[1])
+    at.slider[0].set_value(20)
+    at.slider[1].set_value(90)
+    at.slider[2].set_value(80)
+    at.slider[3].set_value(90)
+    _, app["predict_submit_s"] = timed(at.button[0].click().run)
+
+    # 预测立方体单独计时：先生成立方体（SCORE_CUBE_DIR 指向临时目录），再测量查表预测的耗时
+    from linear_scorer import LinearScorer
+    from model_registry import get_model, model_info
+    from score_cube import ensure_cube
+
+    scorer = get_model("score_model.json", LinearScorer.from_json_bytes)
+    _, app["score_cube_build_s"] = timed(ensure_cube, scorer, model_info("score_model.json")["version"])
+    os.environ["SCORE_CUBE"] = "1"
+    _, app["predict_submit_cube_s"] = timed(at.button[0].click().run)
+    app["exceptions"] = [exception.message for exception in at.exception]
+    return app
+
+
+def run_child(rows):
+    """子进程：生成数据并测量一个规模，结果以 JSON 输出到标准输出的最后一行"""
+    csv_path, generate_s = timed(student_csv, rows, BENCH_DATA_DIR)
+    result = {
+        "rows": rows,
+        "csv_mb": round(os.path.getsize(csv_path) / 1024 ** 2, 1),
+        "generate_s": generate_s,
+        "stages": run_stages(csv_path),
+        "app": run_app(os.path.join(os.path.dirname(os.path.abspath(__file__)), "main_page.py")),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def run_size(rows):
+    """在独立的子进程中测量一个规模，保证每个规模都是冷启动、缓存互不影响"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        # 应用读取合成数据，快照和预测立方体写到临时目录，不影响真实数据的快照
+        env = dict(
+            os.environ,
+            SNAPSHOT_DIR=snapshot_dir,
+            SCORE_CUBE_DIR=os.path.join(snapshot_dir, "score_cube"),
+            STUDENT_DATA_FILE=student_csv_path(rows, BENCH_DATA_DIR),
+        )
+        try:
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", str(rows)],
+                capture_output=True, text=True, cwd=root, env=env, timeout=CHILD_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            return {"rows": rows, "error": f"超过 {CHILD_TIMEOUT} 秒未完成"}
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines() or [f"退出码 {completed.returncode}"]
+        return {"rows": rows, "error": lines[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        run_child(int(args[1]))
+        exit(0)
+
+    sizes = DEFAULT_SIZES
+    output = DEFAULT_OUTPUT
+    if "--sizes" in args:
+        sizes = [int(size) for size in args[args.index("--sizes") + 1].split(",")]
+    if "--output" in args:
+        output = args[args.index("--output") + 1]
+
+    results = []
+    for rows in sizes:
+        print(f"正在测量 {rows} 行 ...", flush=True)
+        result = run_size(rows)
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False, indent=2), flush=True)
+
+    report = {
+        "benchmark": "student_app",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
@@ -0,0 +1,202 @@
+import json
+import os
+import pickle
+import platform
+import resource
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmark_student_app import git_commit, timed
+from synthetic_data import insurance_csv, penguin_csv, student_csv
+
+# 默认的数据规模（行数），可用 --sizes 10000,100000 覆盖
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+# 随机森林测量的 n_jobs 设置，可用 --n-jobs 1,-1 覆盖；线性回归只用单线程训练
+DEFAULT_N_JOBS = [1, 2, 4, -1]
+DEFAULT_OUTPUT = os.path.join("benchmark_results", "training.json")
+# 合成数据的存放目录，同样的行数只生成一次
+BENCH_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench_data")
+# 单次训练的超时时间（秒）
+CHILD_TIMEOUT = 3600
+RANDOM_STATE = 42
+
+# 三条训练流程：生成数据的函数、特征列、目标列、模型、评估指标
+# 与 predict_score_model.py、save_model.py、train_penguin_model.py 的训练方式相同
+PIPELINES = {
+    "score": {
+        "make_csv": student_csv,
+        "encoding": "utf-8",
+        "features": ["每周学习时长（小时）", "上课出勤率", "作业完成率", "期中考试分数"],
+        "target": "期末考试分数",
+        "model": "LinearRegression",
+        "metric": "rmse",
+    },
+    "insurance": {
+        "make_csv": insurance_csv,
+        "encoding": "gbk",
+        "features": ["年龄", "性别", "BMI", "子女数量", "是否吸烟", "区域"],
+        "target": "医疗费用",
+        "model": "RandomForestRegressor",
+        "metric": "r2",
+    },
+    "penguins": {
+        "make_csv": penguin_csv,
+        "encoding": "gbk",
+        "features": ["喙的长度", "喙的深度", "翅膀的长度", "身体质量", "企鹅栖息的岛屿", "性别"],
+        "target": "企鹅的种类",
+        "model": "RandomForestClassifier",
+        "metric": "accuracy",
+    },
+}
+
+
+def make_model(name, n_jobs):
+    if name == "LinearRegression":
+        from sklearn.linear_model import LinearRegression
+
+        return LinearRegression()
+    from sklearn import ensemble
+
+    return getattr(ensemble, name)(n_estimators=100, random_state=RANDOM_STATE, n_jobs=n_jobs)
+
+
+def load_data(pipeline, csv_path):
+    """读取数据并按训练脚本的方式编码，返回 (特征, 目标)"""
+    from feature_encoder import FeatureEncoder
+
+    df = pd.read_csv(csv_path, encoding=pipeline["encoding"]).dropna()
+    features = df[pipeline["features"]]
+    encoder = FeatureEncoder.fit(features)
+    X = pd.DataFrame(encoder.transform(features), columns=encoder.feature_names)
+    y = df[pipeline["target"]]
+    if pipeline["metric"] == "accuracy":
+        y = pd.factorize(y)[0]
+    return X, y
+
+
+def score(metric, y_true, y_pred):
+    from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
+
+    if metric == "rmse":
+        return float(np.sqrt(mean_squared_error(y_true, y_pred)))
+    if metric == "r2":
+        return float(r2_score(y_true, y_pred))
+    return float(accuracy_score(y_true, y_pred))
+
+
+class ByteCounter:
+    """只统计写入的字节数，测量模型 pickle 后的大小而不在内存中生成完整的字节串"""
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+
+def run_child(name, csv_path, n_jobs):
+    """子进程：训练一次并测量，结果以 JSON 输出到标准输出的最后一行"""
+    from sklearn.model_selection import train_test_split
+
+    pipeline = PIPELINES[name]
+    (X, y), load_s = timed(load_data, pipeline, csv_path)
+    x_train, x_test, y_train, y_test = train_test_split(X, y, train_size=0.8, random_state=RANDOM_STATE)
+    model = make_model(pipeline["model"], n_jobs)
+    _, fit_s = timed(model.fit, x_train, y_train)
+    y_pred, predict_s = timed(model.predict, x_test)
+    # 子进程的内存峰值：包括读取数据、编码、训练和预测
+    peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    counter = ByteCounter()
+    pickle.dump(model, counter)
+    result = {
+        "load_s": load_s,
+        "fit_s": fit_s,
+        "predict_s": predict_s,
+        "metric": round(score(pipeline["metric"], y_test, y_pred), 4),
+        "artifact_kb": round(counter.size / 1024, 1),
+        "peak_rss_mb": peak_rss_mb,
+    }
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def run_one(name, rows, n_jobs):
+    """在独立的子进程中训练一次，保证内存峰值只属于这一次训练"""
+    pipeline = PIPELINES[name]
+    csv_path = pipeline["make_csv"](rows, BENCH_DATA_DIR)
+    result = {
+        "pipeline": name,
+        "model": pipeline["model"],
+        "rows": rows,
+        "n_jobs": n_jobs,
+        "csv_mb": round(os.path.getsize(csv_path) / 1024 ** 2, 1),
+        "metric_name": pipeline["metric"],
+    }
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name, csv_path, str(n_jobs)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), timeout=CHILD_TIMEOUT
+        )
+    except subprocess.TimeoutExpired:
+        result["error"] = f"超过 {CHILD_TIMEOUT} 秒未完成"
+        return result
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines() or [f"退出码 {completed.returncode}"]
+        result["error"] = lines[-1]
+        return result
+    result.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return result
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--child"]:
+        run_child(args[1], args[2], int(args[3]))
+        exit(0)
+
+    # 训练规模基准测试：python benchmark_training.py [--sizes ...] [--n-jobs ...] [--pipelines score,insurance,penguins] [--output ...]
+    sizes = DEFAULT_SIZES
+    n_jobs_list = DEFAULT_N_JOBS
+    names = list(PIPELINES)
+    output = DEFAULT_OUTPUT
+    if "--sizes" in args:
+        sizes = [int(size) for size in args[args.index("--sizes") + 1].split(",")]
+    if "--n-jobs" in args:
+        n_jobs_list = [int(n_jobs) for n_jobs in args[args.index("--n-jobs") + 1].split(",")]
+    if "--pipelines" in args:
+        names = args[args.index("--pipelines") + 1].split(",")
+    if "--output" in args:
+        output = args[args.index("--output") + 1]
+
+    results = []
+    for name in names:
+        for rows in sizes:
+            # n_jobs 对线性回归的训练没有影响，只测一次
+            for n_jobs in (n_jobs_list if PIPELINES[name]["model"] != "LinearRegression" else [1]):
+                print(f"正在测量 {name}：{rows} 行，n_jobs={n_jobs} ...", flush=True)
+                result = run_one(name, rows, n_jobs)
+                results.append(result)
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+
+    report = {
+        "benchmark": "training",
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"{'流程':<12}{'行数':>10}{'n_jobs':>8}{'训练(s)':>10}{'内存峰值(MB)':>14}{'模型(KB)':>12}{'指标':>18}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['pipeline']:<12}{result['rows']:>10}{result['n_jobs']:>8}  错误：{result['error']}")
+            continue
+        print(f"{result['pipeline']:<12}{result['rows']:>10}{result['n_jobs']:>8}{result['fit_s']:>10.3f}"
+              f"{result['peak_rss_mb']:>14.1f}{result['artifact_kb']:>12.1f}"
+              f"{result['metric_name'] + '=' + format(result['metric'], '.4f'):>18}")
+    print(f"结果已写入 {output}")
@@ -0,0 +1,174 @@
+import hashlib
+import io
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from atomic_io import write_json_atomic
+
+# 快照文件统一放在这个目录下（可以用环境变量 SNAPSHOT_DIR 改到持久化卷上）
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", ".snapshots")
+# 解析期间源文件被追加时最多重新解析的次数，之后只解析开始时已经写完的行
+PARSE_RETRIES = 3
+
+
+def file_signature(path):
+    """读取源文件的大小和修改时间，作为快照是否过期的快速判断依据"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def file_digest(path, chunk_size=1 << 20, size=None):
+    """分块计算源文件（或文件前 size 个字节）的 sha256，只在大小相同但修改时间变化时才需要"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = os.path.getsize(path) if size is None else size
+        while remaining > 0:
+            block = f.read(min(chunk_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def complete_prefix_size(path, size, chunk_size=1 << 16):
+    """文件前 size 个字节中完整行的字节数（最后一个换行符之后的内容可能还没写完）"""
+    with open(path, "rb") as f:
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+class PrefixReader(io.RawIOBase):
+    """只读取文件前 limit 个字节的只读流，之后追加的内容读不到"""
+
+    def __init__(self, f, limit):
+        self.f = f
+        self.remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.remaining <= 0:
+            return 0
+        n = self.f.readinto(memoryview(buffer)[:self.remaining])
+        self.remaining -= n
+        return n
+
+
+def snapshot_paths(source, snapshot_dir=None):
+    """返回 (快照parquet路径, 元数据json路径)"""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    name = os.path.basename(source)
+    data_path = os.path.join(snapshot_dir, name + ".parquet")
+    return data_path, data_path + ".meta.json"
+
+
+def read_meta(source, snapshot_dir=None):
+    """读取快照元数据，没有快照时返回 None"""
+    _, meta_path = snapshot_paths(source, snapshot_dir)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_fresh(source, meta, key="", snapshot_dir=None):
+    """
+    判断快照是否仍然对应当前的源文件
+    - 大小、修改时间都没变：直接认为有效
+    - 大小没变但修改时间变了（例如被 touch 或重新拷贝）：比较内容哈希，
+      一致时顺便把新的修改时间写回元数据，下次就不用再算哈希
+    """
+    if meta is None or meta.get("key") != key:
+        return False
+    data_path, meta_path = snapshot_paths(source, snapshot_dir)
+    if not os.path.exists(data_path):
+        return False
+    signature = file_signature(source)
+    if signature["size"] != meta["size"]:
+        return False
+    if signature["mtime_ns"] == meta["mtime_ns"]:
+        return True
+    if file_digest(source) != meta["sha256"]:
+        return False
+    meta["mtime_ns"] = signature["mtime_ns"]
+    write_json_atomic(meta_path, meta)
+    return True
+
+
+def build_snapshot(source, parse, key="", snapshot_dir=None):
+    """用 parse(source) 解析源文件，并把结果写成 parquet 快照，返回 (DataFrame, 元数据)"""
+    data_path, meta_path = snapshot_paths(source, snapshot_dir)
+    # 解析前后的签名必须一致，否则说明解析期间源文件被追加了，需要重新解析，
+    # 这样元数据里的 size 才能准确表示快照覆盖到源文件的哪个字节
+    for _ in range(PARSE_RETRIES):
+        signature = file_signature(source)
+        df = parse(source)
+        if file_signature(source) == signature:
+            break
+    else:
+        # 源文件一直在被追加（只追加的CSV）：只解析开始时已经写完的行，
+        # 之后追加的行由调用方按元数据里的 size 增量读取
+        signature = file_signature(source)
+        signature["size"] = complete_prefix_size(source, signature["size"])
+        with open(source, "rb") as f:
+            df = parse(io.BufferedReader(PrefixReader(f, signature["size"])))
+    meta = {"key": key, "sha256": file_digest(source, size=signature["size"]), **signature}
+
+    os.makedirs(os.path.dirname(data_path) or ".", exist_ok=True)
+    # 临时文件名带进程号：多个副本共用同一个快照目录同时冷启动时，不会写进同一个临时文件
+    tmp_path = f"{data_path}.tmp{os.getpid()}"
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", index=False)
+        os.replace(tmp_path, data_path)
+        write_json_atomic(meta_path, meta)
+    except OSError:
+        # 其他进程已经写好了同一份源文件的快照：本进程解析的数据同样有效，直接使用
+        if not is_fresh(source, read_meta(source, snapshot_dir), key, snapshot_dir):
+            raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df, meta
+
+
+def load_snapshot_with_meta(source, parse, columns=None, key="", snapshot_dir=None):
+    """同 load_snapshot，额外返回快照元数据（其中 size 为快照覆盖的源文件字节数）"""
+    data_path, _ = snapshot_paths(source, snapshot_dir)
+    meta = read_meta(source, snapshot_dir)
+    if is_fresh(source, meta, key, snapshot_dir):
+        if columns is not None:
+            names = pq.read_schema(data_path).names
+            columns = [col for col in columns if col in names]
+        df = pd.read_parquet(data_path, engine="pyarrow", columns=columns, memory_map=True)
+        return df, meta
+
+    df, meta = build_snapshot(source, parse, key, snapshot_dir)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df, meta
+
+
+def load_snapshot(source, parse, columns=None, key="", snapshot_dir=None):
+    """
+    以列式快照的方式读取源文件
+    :param source: 源文件路径（csv/xlsx 等）
+    :param parse: 快照失效时用来解析源文件的函数，参数为源文件路径，返回 DataFrame
+    :param columns: 需要的列，只读取这些列；快照里不存在的列会被忽略，由调用方自行校验
+    :param key: 解析方式的版本号，解析逻辑改变时修改它即可让旧快照失效
+    :return: DataFrame
+    """
+    df, _ = load_snapshot_with_meta(source, parse, columns, key, snapshot_dir)
+    return df
@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import write_json_atomic
+
+# 导出文件的格式版本，字段有变化时加一
+FORMAT_VERSION = 1
+
+
+class FeatureEncoder:
+    """
+    与 pd.get_dummies 结果一致的特征编码器
+    数值列按原顺序放在前面，类别列依次展开为 "列名_取值" 的独热列（取值按排序后的顺序）
+    训练时拟合一次并保存，应用端读取同一份编码规则，保证训练和预测的特征完全一致
+    """
+
+    def __init__(self, numeric_cols, categories):
+        self.numeric_cols = list(numeric_cols)
+        # {类别列: [取值, ...]}，独热列的顺序与取值顺序一致
+        self.categories = {col: list(values) for col, values in categories.items()}
+        self.feature_names = self.numeric_cols + [
+            f"{col}_{value}" for col, values in self.categories.items() for value in values
+        ]
+        # 每个类别列的独热列在结果矩阵中的起始位置，以及 取值 -> 列号 的映射
+        self._offsets = {}
+        self._index = {}
+        offset = len(self.numeric_cols)
+        for col, values in self.categories.items():
+            self._offsets[col] = offset
+            self._index[col] = {value: offset + i for i, value in enumerate(values)}
+            offset += len(values)
+
+    @classmethod
+    def fit(cls, df):
+        """从训练数据中学习编码规则：非数值列视为类别列，取值排序后作为独热列"""
+        numeric_cols = [col for col in df.columns if pd.api.types.is_numeric_dtype(df[col])]
+        categories = {
+            col: sorted(df[col].dropna().unique().tolist())
+            for col in df.columns if col not in numeric_cols
+        }
+        return cls(numeric_cols, categories)
+
+    @property
+    def input_cols(self):
+        return self.numeric_cols + list(self.categories)
+
+    def transform(self, rows):
+        """
+        批量编码
+        :param rows: DataFrame、字典或字典的列表，键为原始列名
+        :return: 二维 float64 数组，列顺序与 feature_names 一致
+        """
+        if isinstance(rows, dict):
+            return self.transform_row(rows)[None, :]
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame(list(rows))
+        missing = [col for col in self.input_cols if col not in rows.columns]
+        if missing:
+            raise ValueError(f"缺少必要的特征：{missing}")
+
+        X = np.zeros((len(rows), len(self.feature_names)))
+        X[:, :len(self.numeric_cols)] = rows[self.numeric_cols].to_numpy(dtype=np.float64)
+        row_ids = np.arange(len(rows))
+        for col, values in self.categories.items():
+            # 按训练时的取值顺序编码，未见过的取值编码为 -1
+            codes = pd.Categorical(rows[col], categories=values).codes
+            if (codes < 0).any():
+                unknown = sorted(set(rows[col][codes < 0].astype(str)))
+                raise ValueError(f"{col} 中有训练时未出现的取值：{unknown}")
+            X[row_ids, self._offsets[col] + codes] = 1.0
+        return X
+
+    def transform_row(self, row):
+        """单个样本编码，row 为 {原始列名: 值} 字典，不需要构造 DataFrame"""
+        x = np.zeros(len(self.feature_names))
+        try:
+            for i, col in enumerate(self.numeric_cols):
+                x[i] = row[col]
+            for col, index in self._index.items():
+                x[index[row[col]]] = 1.0
+        except KeyError as e:
+            raise ValueError(f"缺少必要的特征或取值未出现过：{e}") from None
+        return x
+
+    def to_dict(self):
+        return {
+            "format_version": FORMAT_VERSION,
+            "numeric_cols": self.numeric_cols,
+            "categories": self.categories,
+            "feature_names": self.feature_names,
+        }
+
+    def save(self, path):
+        write_json_atomic(path, self.to_dict(), indent=2)
+
+    @classmethod
+    def from_json_bytes(cls, data):
+        """从保存的 JSON 内容创建编码器（可直接作为 model_registry 的 loader 使用）"""
+        artifact = json.loads(data)
+        if artifact.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的编码器文件版本：{artifact.get('format_version')}")
+        return cls(artifact["numeric_cols"], artifact["categories"])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_json_bytes(f.read())
@@ -1,67 +1,63 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
+import os
+from sales_cube import SalesCube, cube_kpis
+from sales_feed import REFRESH_SECONDS, SALES_FEED_FILE, LiveSales
+from sales_loader import SALES_SOURCE, load_sales_files, resolve_sources, source_signature
 
-def get_dataframe_from_excel():
-    # 读取Excel文件，指定工作表、跳过首行、设置订单号为索引
-    #  read_excel()函数用于读取excel文件
-    #  supermarket_sales.xlsx表示销售数据的路径及名称
-    #  sheet_name='销售数据' 表示读取名为销售数据的工作表的数据
-    #  skiprows=1 表示跳过第一行
-    #  index_col='订单号' 表示这一列作为返回的数据框索引
-    df = pd.read_excel('supermarket_sales.xlsx',
-                       sheet_name='销售数据',
-                       skiprows=1,
-                       index_col='订单号'
-                       )
-    # 从时间列提取小时数，生成新列
-    #  df['时间'] 取出原有时间列，其中包含的交易完整时间字符串，如‘10：25：30’
-    #  pd.to_datetime 将时间列转换为datetime类型
-    #  format="%H:%M:%S" 表示指定原有字符串格式
-    #  .dt.hour 表示从转换后的数据框索引取出小时数作为新列
-    df['小时数'] = pd.to_datetime(df["时间"], format="%H:%M:%S").dt.hour
-    return df
-
-def add_sidebar_func(df):
+# 所有会话共用一份数据；每个工作簿的修改时间和大小参与缓存键，任何文件更新后重新读取
+@st.cache_resource
+def load_sales_data(signature):
+    # 多个工作簿在进程池中并行读取；工作簿没有变化时直接读取列式快照（已包含小时数列），不再解析Excel
+    df, file_timings = load_sales_files([path for path, _, _ in signature])
+    # 预先汇总的销售立方体（带筛选用的位图索引）与数据一起构建、一起缓存
+    return df, SalesCube(df), file_timings
+
+def get_sales_data():
+    """返回 (销售数据, 销售立方体, 每个文件的读取耗时)；数据来源由环境变量 SALES_SOURCE 指定"""
+    return load_sales_data(source_signature(resolve_sources(SALES_SOURCE)))
+
+# 实时交易：所有会话共用一个读取位置和立方体；工作簿更新后从头接入
+@st.cache_resource
+def load_live_sales(_sale_df, feed_path, signature):
+    return LiveSales(_sale_df, feed_path)
+
+def get_live_sales(sale_df):
+    return load_live_sales(sale_df, SALES_FEED_FILE, source_signature(resolve_sources(SALES_SOURCE)))
+
+def add_sidebar_func(cube):
     # 创建侧边栏
     with st.sidebar:
         # 添加侧边栏标题
         st.header("请筛选数据：")
         # 城市筛选
-        #求数据框"城市"列去除重复值后，赋值给city_unique
-        city_unique = df["城市"].unique()     
+        #求"城市"列去除重复值后，赋值给city_unique
+        city_unique = cube.options("城市")
         city = st.multiselect(
             "请选择城市：",
             options=city_unique,   #将所有选项设置为city_unique
             default=city_unique,   #第一次的默认选项设置为city_unique
         )
         # 顾客类型筛选
-        #求数据框"顾客类型"列去除重复值后，赋值给customer_type_unique
-        customer_type_unique = df["顾客类型"].unique()
+        #求"顾客类型"列去除重复值后，赋值给customer_type_unique
+        customer_type_unique = cube.options("顾客类型")
         customer_type = st.multiselect(
             "请选择顾客类型：",
             options=customer_type_unique,   #将所有选项设置为customer_type
             default=customer_type_unique,   #第一次的默认选项设置为customer_type
         )  
-        # 性别筛选。求数据框"性别"列取出重复值后，赋值给gender_unique
-        gender_unique = df["性别"].unique()
+        # 性别筛选。求"性别"列取出重复值后，赋值给gender_unique
+        gender_unique = cube.options("性别")
         gender = st.multiselect(
             "请选择性别：",  
             options=gender_unique,    #将所有选项设置为gender_unique
             default=gender_unique,    #第一次的默认选项设置为gender_unique
         )
-        # 根据筛选条件过滤数据
-        #query():查询方法，传入过滤条件字段
-        #@city 通过@可以使用streamlit多选下拉框"城市"的值
-        #@customer_type 通过@可以使用streamlit多选下拉框"顾客类型"的值
-        #@gender 通过@可以使用streamlit多选下拉框"性别"的值
-        df_selection = df.query(
-            "城市 == @city & 顾客类型 == @customer_type & 性别 == @gender"
-        )
-    return df_selection
+    # 返回筛选条件，由立方体选出满足条件的单元格
+    return {"城市": city, "顾客类型": customer_type, "性别": gender}
 
 def product_line_chart(df):
-    #将df按'产品类型列分组'，并计算'总价'列的和，然后按总价排序
+    #将立方体单元格按'产品类型列分组'，并计算'总价'列（各单元格的销售额）的和，然后按总价排序
     sales_by_product_line = (
         df.groupby(by=["产品类型"])[["总价"]].sum().sort_values(by="总价")
     )
@@ -77,7 +73,7 @@ def product_line_chart(df):
     return fig_product_sales
 
 def hour_chart(df):
-    #将df按‘小时数’列分组，并计算‘总价’列的和
+    #将立方体单元格按‘小时数’列分组，并计算‘总价’列（各单元格的销售额）的和
     sales_by_hour = df.groupby(by=["小时数"])[["总价"]].sum()
     #使用px.bar函数生成条形图
     #- x="总价"：条形图的长度表示总价
@@ -93,22 +89,22 @@ def hour_chart(df):
     return fig_hour_sales
 
 def main_page_demo(df):
-    """主界面函数：展示关键指标和图表"""
+    """主界面函数：展示关键指标和图表（df 为选中的立方体单元格）"""
     #设置标题
     st.title("销售仪表板")
     #创建关键指标信息区，生成3个列容器
     left_key_col, middle_key_col, right_key_col = st.columns(3)
 
-    #选中数据框中的“总价”列，使用sum()计算“总价”列的和，使用int()求整
-    total_sales = int(df["总价"].sum())
-    #选中数据框中的“评分”列，使用mean()计算“评分”列的平均值，使用round()四舍五入
-    #保留1位小数
-    average_rating = round(df["评分"].mean(), 1)
+    #由单元格的销售额之和、评分之和、订单数求出总销售额、评分平均值和每单平均销售额
+    total_sales, average_rating, average_sale_by_transaction = cube_kpis(df)
+    #总销售额使用int()求整
+    total_sales = int(total_sales)
+    #评分平均值使用round()四舍五入，保留1位小数
+    average_rating = round(average_rating, 1)
     #对刚刚的结果再次四舍五入，只保留整数，并使用int()函数，表示就要整数，增加代码的可读性
     star_rating_string = ":star:" * int(round(average_rating, 0))
-    #选中数据框中的“总价”列，使用mean()计算“总价”列的平均值，使用round()四舍五入
-    #保留2位小数
-    average_sale_by_transaction = round(df["总价"].mean(), 2)
+    #每单平均销售额使用round()四舍五入，保留2位小数
+    average_sale_by_transaction = round(average_sale_by_transaction, 2)
 
     with left_key_col:
         st.subheader("总销售额：")
@@ -138,6 +134,20 @@ def main_page_demo(df):
         #展开生成的plotly图形，并设置使用父容器的宽度
         st.plotly_chart(product_fig, use_container_width=True)
 
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_page_demo(live_sales, selection):
+    """实时模式：定时读取新追加的交易，累加到立方体后重新展示指标和图表（只刷新这一部分页面）"""
+    live_sales.refresh()
+    main_page_demo(live_sales.cube.select(selection))
+    st.caption(
+        f"实时数据：已接入 {live_sales.new_rows} 条新交易，"
+        f"每 {REFRESH_SECONDS:g} 秒刷新一次，最后刷新于 {live_sales.refreshed_at:%H:%M:%S}"
+    )
+    if live_sales.skipped_lines:
+        st.warning(
+            f"⚠️ 交易文件中有 {live_sales.skipped_lines} 行格式错误，已跳过（最后一行：{live_sales.last_bad_line}）"
+        )
+
 def run_app():
     """启动页面"""
     #设置页面
@@ -147,11 +157,24 @@ def run_app():
         layout="wide"
     )
     #将Excel中的销售数据读取到数据框中
-    sale_df = get_dataframe_from_excel()
-    #添加不同的多选下拉按钮，并形成筛选后的数据框，构建筛选区
-    df_selection = add_sidebar_func(sale_df)
-    #构建主页面
-    main_page_demo(df_selection)
+    sale_df, sales_cube, file_timings = get_sales_data()
+    #侧边栏显示每个工作簿的读取耗时
+    with st.sidebar.expander(f"📁 数据文件（{len(file_timings)} 个）"):
+        st.dataframe(file_timings, use_container_width=True, hide_index=True)
+    #存在实时交易文件时进入实时模式
+    if os.path.exists(SALES_FEED_FILE):
+        live_sales = get_live_sales(sale_df)
+        live_sales.refresh()
+        #添加不同的多选下拉按钮，构建筛选区（选项包括新交易中出现的取值）
+        selection = add_sidebar_func(live_sales.cube)
+        #构建主页面，并定时刷新
+        live_page_demo(live_sales, selection)
+    else:
+        #添加不同的多选下拉按钮，构建筛选区
+        selection = add_sidebar_func(sales_cube)
+        #用位图索引选出满足条件的立方体单元格：同一维度内的选项取并集，不同维度之间取交集
+        #同样的选择组合只计算一次，之后直接从缓存中取结果
+        main_page_demo(sales_cube.select(selection))
 
     #标准的pyhon开始程序
 if __name__ == "__main__":
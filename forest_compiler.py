@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+# 导出文件的格式版本，字段有变化时加一
+FORMAT_VERSION = 2
+
+# 节点数组：每个数组保存为目录下的一个 .npy 文件，读取时以只读方式内存映射
+ARRAY_NAMES = ["feature", "threshold", "left", "right", "value", "roots"]
+
+
+class CompiledForest:
+    """
+    把随机森林展开成扁平的节点数组，预测时不需要 scikit-learn
+    所有树的节点拼接在一起：feature、threshold、left、right 按节点编号存放，
+    叶子节点的 left/right 指向自己，这样所有树可以同时向下走同样的步数
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 feature_names, classes=None, source_sha256=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        # 分类模型才有 classes，回归模型为 None
+        self.classes = classes
+        # 编译来源 pkl 文件的 sha256（保存时记录），用来判断编译结果是否对应当前的 pkl
+        self.source_sha256 = source_sha256
+
+    @property
+    def is_classifier(self):
+        return self.classes is not None
+
+    def _leaf_values(self, X):
+        """所有树、所有行同时向下走，返回每棵树落到的叶子节点的值，形状 (树, 行, ...)"""
+        if hasattr(X, "columns"):
+            X = X[self.feature_names].to_numpy()
+        # 和 scikit-learn 一样先转成 float32 再与 float64 的阈值比较，保证走到相同的分支
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        rows = np.arange(X.shape[0])
+        nodes = np.repeat(self.roots[:, None], X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes]
+
+    def predict_proba(self, X):
+        """分类模型：各棵树叶子节点的类别比例取平均"""
+        return self._leaf_values(X).mean(axis=0)
+
+    def predict(self, X):
+        """
+        批量预测
+        :param X: DataFrame（按列名取特征）或二维数组（列顺序与 feature_names 一致）
+        :return: 回归模型返回预测值数组，分类模型返回类别数组
+        """
+        if self.is_classifier:
+            return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+        return self._leaf_values(X).mean(axis=0)
+
+    def predict_row(self, row):
+        """单个样本预测，row 为按 feature_names 顺序排列的特征值列表"""
+        return self.predict(np.asarray(row)[None, :])[0]
+
+    def save(self, path, source_sha256=None):
+        """
+        保存为目录：节点数组各存一个未压缩的 .npy 文件，其余信息写入 meta.json
+        source_sha256 为编译来源 pkl 文件的 sha256，应用端据此判断编译结果是否过期
+        先写到临时目录再整体换上，正在运行的应用不会读到写了一半的文件
+        临时目录名唯一，多个进程同时保存也不会写进同一个临时目录
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        tmp_path = tempfile.mkdtemp(prefix=os.path.basename(path) + ".tmp", dir=parent)
+        # mkdtemp 创建的目录只有自己可读，改为与普通目录相同的权限
+        os.chmod(tmp_path, 0o755)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp_path, name + ".npy"), np.ascontiguousarray(getattr(self, name)))
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "feature_names": self.feature_names,
+            "classes": None if self.classes is None else self.classes.tolist(),
+            "source_sha256": source_sha256 or self.source_sha256,
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        # 已经映射旧文件的进程不受影响：文件被删除后，映射的内容在进程退出前一直有效
+        old_path = tmp_path + ".old"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # 其他进程刚刚换上了它保存的结果，保留那一份
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        """
+        以只读内存映射的方式打开节点数组，几乎不花时间
+        同一台机器上的多个 Streamlit 进程共用操作系统缓存中的同一份物理内存
+        """
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的模型文件版本：{meta.get('format_version')}")
+        # 转成普通 ndarray 视图（仍指向映射的内存），避免 np.memmap 子类在每次索引时的额外开销
+        arrays = {
+            name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r", allow_pickle=False).view(np.ndarray)
+            for name in ARRAY_NAMES
+        }
+        classes = None if meta["classes"] is None else np.array(meta["classes"])
+        return cls(max_depth=meta["max_depth"], feature_names=meta["feature_names"], classes=classes,
+                   source_sha256=meta.get("source_sha256"), **arrays)
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+
+def sha256_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def compile_forest(model):
+    """把训练好的 RandomForestRegressor / RandomForestClassifier 编译成 CompiledForest"""
+    is_classifier = hasattr(model, "classes_")
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count, dtype=np.int32)
+        is_leaf = tree.children_left < 0
+        roots.append(offset)
+        # 叶子节点：特征取 0、子节点指向自己，多走几步也停在原地
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.int32) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.int32) + offset)
+        value = tree.value[:, 0, :]
+        if is_classifier:
+            # 每个节点的类别计数归一化为比例，与 predict_proba 的计算一致
+            value = value / value.sum(axis=1, keepdims=True)
+        else:
+            value = value[:, 0]
+        values.append(value)
+        offset += tree.node_count
+    return CompiledForest(
+        np.concatenate(features), np.concatenate(thresholds),
+        np.concatenate(lefts), np.concatenate(rights), np.concatenate(values),
+        np.array(roots, dtype=np.int32),
+        max(estimator.tree_.max_depth for estimator in model.estimators_),
+        [str(name) for name in model.feature_names_in_],
+        model.classes_ if is_classifier else None,
+    )
+
+
+def check_parity(model, forest, X):
+    """
+    对比 scikit-learn 模型和编译后的模型在同一批数据上的预测
+    :return: 回归模型返回最大绝对误差，分类模型返回预测类别不一致的行数
+    """
+    if forest.is_classifier:
+        return int(np.sum(model.predict(X) != forest.predict(X)))
+    return float(np.max(np.abs(model.predict(X) - forest.predict(X))))
+
+
+def load_compiled(path, pkl_path=None):
+    """
+    读取编译后的模型；编译结果不存在、或者 meta.json 记录的 pkl 哈希与当前 pkl 的内容不一致时，
+    直接从 pkl 在内存中编译，应用进程不写文件（编译结果由训练脚本或 python forest_compiler.py 生成）
+    按内容而不是修改时间判断：git checkout、rsync 等不保证 pkl 和编译结果的修改时间先后
+    """
+    if not pkl_path or not os.path.exists(pkl_path):
+        return CompiledForest.load(path)
+    try:
+        forest = CompiledForest.load(path)
+        if forest.source_sha256 == sha256_file(pkl_path):
+            return forest
+    except (OSError, ValueError, KeyError):
+        pass
+    # 内存中编译的节点数组是进程私有的，不能在多个进程之间共享，提示重新生成编译结果
+    print(f"{path} 与 {pkl_path} 不一致，已在内存中重新编译；"
+          f"请运行 python forest_compiler.py {pkl_path} 重新生成", file=sys.stderr, flush=True)
+    import pickle
+
+    with open(pkl_path, "rb") as f:
+        return compile_forest(pickle.load(f))
+
+
+if __name__ == "__main__":
+    # 编译并做一致性校验：python forest_compiler.py 模型pkl [输出目录]
+    import pickle
+    import time
+
+    pkl_path = sys.argv[1] if len(sys.argv) > 1 else "rfc_model.pkl"
+    forest_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(pkl_path)[0] + ".forest"
+    with open(pkl_path, "rb") as f:
+        sk_model = pickle.load(f)
+    forest = compile_forest(sk_model)
+    forest.save(forest_path, source_sha256=sha256_file(pkl_path))
+    forest = CompiledForest.load(forest_path)
+    print(f"{pkl_path}（{os.path.getsize(pkl_path) / 1024:.1f} KB）"
+          f" -> {forest_path}（{forest.nbytes() / 1024:.1f} KB），共 {len(forest.feature)} 个节点")
+
+    # 用每棵树实际用到的阈值附近的随机数据做校验，各个分支都能覆盖到
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    used = forest.left != np.arange(len(forest.left))
+    low = np.array([forest.threshold[used & (forest.feature == i)].min(initial=0) for i in range(len(forest.feature_names))])
+    high = np.array([forest.threshold[used & (forest.feature == i)].max(initial=1) for i in range(len(forest.feature_names))])
+    span = high - low
+    X = pd.DataFrame(rng.uniform(low - 0.1 * span, high + 0.1 * span, (10000, len(low))), columns=forest.feature_names)
+    diff = check_parity(sk_model, forest, X)
+    print(f"一致性校验：{len(X)} 行数据，{'不一致的行数' if forest.is_classifier else '最大绝对误差'} {diff}")
+
+    row = X.iloc[:1]
+    timings = {}
+    for name, predict in [("scikit-learn", lambda: sk_model.predict(row)),
+                          ("编译后", lambda: forest.predict_row(row.to_numpy()[0]))]:
+        start = time.perf_counter()
+        for _ in range(50):
+            predict()
+        timings[name] = (time.perf_counter() - start) / 50 * 1000
+    print("单条预测：" + "，".join(f"{name} {ms:.3f} ms" for name, ms in timings.items()))
+    if diff > (0 if forest.is_classifier else 1e-9):
+        print("错误：编译后的模型与原模型的预测结果不一致！")
+        exit(1)
+    print("校验通过")
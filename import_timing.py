@@ -0,0 +1,88 @@
+import ast
+import importlib
+import os
+import re
+import subprocess
+import sys
+import time
+
+# 冷启动导入耗时的预算（秒），超过预算时 `python import_timing.py` 返回非0退出码
+DEFAULT_BUDGET_SECONDS = 2.0
+
+# 本进程中按需导入的模块及其首次导入耗时（秒）
+IMPORT_TIMES = {}
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def timed_import(name):
+    """
+    按需导入模块并记录首次导入的耗时
+    用于只在某个页面才用到的重量级模块（例如 plotly），避免拖慢冷启动
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - start
+    return module
+
+
+def startup_imports(script_path):
+    """解析脚本，返回模块顶层（即冷启动时一定会执行）的 import 语句导入的模块名"""
+    with open(script_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script_path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    # 去重并保持顺序
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(stderr):
+    """
+    解析 `python -X importtime` 的输出
+    :return: [(模块名, 自身耗时秒, 累计耗时秒)]，只保留最外层（直接被导入）的模块
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(3) == " ":
+            rows.append((match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6))
+    return rows
+
+
+def measure_cold_imports(modules, cwd=None):
+    """
+    在新的 Python 进程中导入给定模块，测量冷启动时每个模块的导入耗时
+    :return: [(模块名, 自身耗时秒, 累计耗时秒)]，按累计耗时从大到小排序
+    """
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=cwd
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return sorted(parse_importtime(result.stderr), key=lambda row: row[2], reverse=True)
+
+
+if __name__ == "__main__":
+    # 冷启动导入耗时检查：python import_timing.py [脚本路径] [预算秒数]
+    script = sys.argv[1] if len(sys.argv) > 1 else "main_page.py"
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGET_SECONDS
+
+    modules = startup_imports(script)
+    # 在脚本所在目录运行，保证项目内的模块可以被导入
+    rows = measure_cold_imports(modules, cwd=os.path.dirname(os.path.abspath(script)))
+    total = sum(row[2] for row in rows)
+    print(f"{script} 冷启动导入的模块：{', '.join(modules)}")
+    for name, self_time, cumulative in rows[:15]:
+        print(f"{cumulative * 1000:10.1f} ms  {name}")
+    print(f"合计 {total:.3f} 秒（预算 {budget:.3f} 秒）")
+    if total > budget:
+        print("错误：冷启动导入耗时超出预算！请把只在某个页面使用的模块改为按需导入")
+        exit(1)
@@ -0,0 +1,88 @@
+import json
+import sys
+from datetime import datetime
+
+import numpy as np
+
+
+# 导出文件的格式版本，字段有变化时加一
+FORMAT_VERSION = 1
+
+
+class LinearScorer:
+    """
+    不依赖 scikit-learn 的线性回归打分器
+    预测值 = 特征矩阵 · 系数 + 截距，和 LinearRegression.predict 的计算完全相同
+    """
+
+    def __init__(self, feature_names, coef, intercept, meta=None):
+        self.feature_names = list(feature_names)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.meta = meta or {}
+
+    @classmethod
+    def from_json_bytes(cls, data):
+        """从导出的 JSON 内容创建打分器（可直接作为 model_registry 的 loader 使用）"""
+        artifact = json.loads(data)
+        if artifact.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的模型文件版本：{artifact.get('format_version')}")
+        return cls(artifact["feature_names"], artifact["coef"], artifact["intercept"], artifact)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_json_bytes(f.read())
+
+    def predict(self, X):
+        """
+        批量预测
+        :param X: DataFrame（按列名取特征）或二维数组（列顺序与 feature_names 一致）
+        :return: 一维预测值数组
+        """
+        if hasattr(X, "columns"):
+            X = X[self.feature_names].to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_row(self, features):
+        """单个样本预测，features 为 {特征名: 值} 字典，不需要构造 DataFrame"""
+        row = np.array([features[name] for name in self.feature_names], dtype=np.float64)
+        return float(row @ self.coef + self.intercept)
+
+
+def linear_artifact(model, source_sha256=None):
+    """把训练好的 LinearRegression 的截距、系数和特征顺序整理成要导出为 JSON 文件的字典"""
+    return {
+        "format_version": FORMAT_VERSION,
+        "model_type": type(model).__name__,
+        "feature_names": [str(name) for name in model.feature_names_in_],
+        "coef": [float(value) for value in np.ravel(model.coef_)],
+        "intercept": float(np.ravel(model.intercept_)[0]),
+        "source_sha256": source_sha256,
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def check_parity(model, scorer, X):
+    """对比 sklearn 模型和导出的打分器在同一批数据上的预测，返回最大绝对误差"""
+    return float(np.max(np.abs(model.predict(X) - scorer.predict(X))))
+
+
+if __name__ == "__main__":
+    # 一致性校验：python linear_scorer.py [模型pkl] [导出json] [数据csv]
+    import pickle
+
+    import pandas as pd
+
+    defaults = ["score_model.pkl", "score_model.json", "student_data_adjusted_rounded.csv"]
+    pkl_path, json_path, csv_path = sys.argv[1:4] + defaults[len(sys.argv[1:4]):]
+    with open(pkl_path, "rb") as f:
+        sk_model = pickle.load(f)
+    scorer = LinearScorer.load(json_path)
+    data = pd.read_csv(csv_path).dropna()
+    max_diff = check_parity(sk_model, scorer, data[scorer.feature_names])
+    print(f"一致性校验：{len(data)} 行数据，最大绝对误差 {max_diff:.3e}")
+    if max_diff > 1e-9:
+        print("错误：导出的打分器与 score_model.pkl 的预测结果不一致！")
+        exit(1)
+    print("校验通过")
@@ -1,12 +1,16 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-import pickle  
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
+import io
+import os
+from columnar_cache import load_snapshot_with_meta
+from student_aggregates import MajorAggregates, frame_fingerprint, major_distributions
+from student_data import MEMORY_BUDGET_MB, SNAPSHOT_KEY, frame_memory_report, read_student_csv, training_view
+from model_registry import get_model, model_info
+from score_schema import FEATURE_COLS, grade_labels
+from linear_scorer import LinearScorer
+from score_cube import CUBE_AXES, cube_if_ready
+from import_timing import IMPORT_TIMES, measure_cold_imports, startup_imports, timed_import
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,12 +22,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 中文显示配置
-plt.rcParams["font.family"] = ["SimHei", "WenQuanYi Micro Hei", "Heiti TC"]
-plt.rcParams["axes.unicode_minus"] = False
+# 学生数据文件（必须确保该文件存在于运行目录，基准测试时可用环境变量 STUDENT_DATA_FILE 替换）
+DATA_FILE = os.environ.get("STUDENT_DATA_FILE", "student_data_adjusted_rounded.csv")
 
 # 读取CSV文件里的数据
-@st.cache_data
+# 数据在进程内只保留一份，所有会话共用（只读使用，不能原地修改）
+@st.cache_resource
 def load_real_data():
     try:
 
@@ -31,8 +35,11 @@ def load_real_data():
             "学号", "性别", "专业", "每周学习时长（小时）", 
             "上课出勤率", "期中考试分数", "作业完成率", "期末考试分数"
         ]
-        # 读取真实数据文件（必须确保该文件存在于运行目录）
-        df = pd.read_csv("student_data_adjusted_rounded.csv")
+        # 首次读取时解析CSV并生成列式快照，之后只按需读取raw_cols中的列
+        # 解析时直接使用紧凑的数据类型（category / float32 / uint32）
+        df, snapshot_meta = load_snapshot_with_meta(
+            DATA_FILE, read_student_csv, columns=raw_cols, key=SNAPSHOT_KEY
+        )
         
         # 检查列名是否匹配
         missing_cols = [col for col in raw_cols if col not in df.columns]
@@ -40,48 +47,222 @@ def load_real_data():
             st.error(f"❌ CSV文件缺少列：{', '.join(missing_cols)}")
             st.stop()
         
-        # 仅保留需要的列
-        df = df[raw_cols].copy()
-        
-        # 1. 专业性别比例汇总
-        gender_ratio = df.groupby("专业")["性别"].value_counts(normalize=True).unstack(fill_value=0)
-        if "男" not in gender_ratio.columns: gender_ratio["男"] = 0.0
-        if "女" not in gender_ratio.columns: gender_ratio["女"] = 0.0
-        gender_ratio = gender_ratio.rename(columns={"男": "男生比例", "女": "女生比例"}).reset_index()
-        
-        # 2. 专业学习指标汇总
-        major_agg = df.groupby("专业").agg({
-            "每周学习时长（小时）": "mean",
-            "上课出勤率": "mean",
-            "期中考试分数": "mean",
-            "期末考试分数": "mean",
-            "作业完成率": "mean"
-        }).reset_index()
+        # 仅保留需要的列（快照已经按raw_cols读取时不再复制）
+        if df.columns.tolist() != raw_cols:
+            df = df[raw_cols]
         
-        major_df = pd.merge(gender_ratio, major_agg, on="专业", how="inner")
-         
-        major_df = major_df.rename(columns={
-            "每周学习时长（小时）": "每周平均学时",
-            "期中考试分数": "期中考试平均分",
-            "期末考试分数": "期末考试平均分",
-            "上课出勤率": "平均出勤率",
-            "作业完成率": "作业完成率"
-        })
-        
-        # 训练数据
-        train_df = df.dropna().copy()
+        # 训练数据：没有缺失值时与原始数据共用同一份存储
+        train_df = training_view(df)
         
-        return major_df, train_df, df  # 返回原始df用于展示原始列名数据
+        # 同时返回快照元数据：size 为快照覆盖到的CSV字节数（之后追加的行由专业汇总增量读取），
+        # sha256 为原始数据的指纹
+        return train_df, df, snapshot_meta
     
     except FileNotFoundError:
-        st.error("❌ 未找到 student_data_adjusted_rounded.csv 文件，请检查文件是否在运行目录下！")
+        st.error(f"❌ 未找到 {DATA_FILE} 文件，请检查文件是否在运行目录下！")
         st.stop()
     except Exception as e:
         st.error(f"❌ 数据读取失败：{str(e)}")
         st.stop()
 
+# 专业汇总状态在所有会话之间共享，只在启动时全量统计一次
+@st.cache_resource
+def load_major_aggregates(_raw_df, data_offset):
+    return MajorAggregates.from_frame(DATA_FILE, _raw_df, data_offset)
+
+# 成绩预测模型：predict_score_model.py 导出的截距和系数，用 NumPy 点积打分，不需要 scikit-learn
+SCORE_MODEL_FILE = 'score_model.json'
+
+def get_score_model():
+    # 从进程级模型注册表获取模型：只在首次使用或模型文件更新后才重新加载
+    return get_model(SCORE_MODEL_FILE, LinearScorer.from_json_bytes)
+
+# 预测立方体：在所有滑块取值组合上预先算好的预测结果，预测时只需查表
+# 默认关闭，设置环境变量 SCORE_CUBE=1 开启；立方体约 150 MB，可以提前用 python score_cube.py 生成
+USE_SCORE_CUBE = os.environ.get("SCORE_CUBE", "0") == "1"
+
+def get_score_cube():
+    # 立方体还没有生成（或模型更新后需要重新生成）时在后台生成，在此之前返回 None，直接调用模型预测
+    return cube_if_ready(get_score_model(), model_info(SCORE_MODEL_FILE)['version'])
+
+# 批量预测：一次向量化调用预测上传文件中的所有学生，并用数组分箱得到成绩等级
+@st.cache_data(max_entries=8)
+def predict_batch_file(file_bytes, file_name, model_version):
+    # model_version 参与缓存键，模型文件更新后会重新预测
+    if file_name.lower().endswith(".xlsx"):
+        batch_df = pd.read_excel(io.BytesIO(file_bytes))
+    else:
+        batch_df = pd.read_csv(io.BytesIO(file_bytes))
+
+    missing_cols = [col for col in FEATURE_COLS if col not in batch_df.columns]
+    if missing_cols:
+        raise ValueError(f"上传文件缺少列：{', '.join(missing_cols)}")
+    missing_rows = int(batch_df[FEATURE_COLS].isna().any(axis=1).sum())
+    if missing_rows:
+        raise ValueError(f"有 {missing_rows} 行特征值缺失，请补全后再上传")
+
+    model = get_score_model()
+    pred_scores = np.clip(model.predict(batch_df[FEATURE_COLS]), 0, 100)
+    batch_df["预测期末成绩"] = pred_scores.round(1)
+    batch_df["成绩等级"] = grade_labels(pred_scores)
+    # 下载用的CSV也一并缓存，点击下载按钮引起的重新运行不必再次导出
+    return batch_df, batch_df.to_csv(index=False).encode("utf-8-sig")
+
+# 在新进程中测量本页面冷启动时顶层import的耗时（结果在所有会话间缓存）
+@st.cache_data
+def load_cold_import_report():
+    rows = measure_cold_imports(startup_imports(__file__))
+    return pd.DataFrame(
+        [(name, round(self_time * 1000, 1), round(cumulative * 1000, 1)) for name, self_time, cumulative in rows],
+        columns=["模块", "自身耗时(ms)", "累计耗时(ms)"]
+    )
+
+# 专业数据分析页面的图表：构建好的图表对象在所有会话之间共享，
+# 只有数据指纹变化时才重新构建，其他控件引起的重新运行直接复用
+@st.cache_resource(max_entries=4)
+def build_major_figures(_major_df, data_fingerprint):
+    px = timed_import("plotly.express")
+    go = timed_import("plotly.graph_objects")
+    
+    fig1 = px.bar(
+        _major_df,
+        x="专业",
+        y=["男生比例", "女生比例"],
+        barmode="group",
+        labels={"value": "比例", "variable": "性别"},
+        title="各专业性别比例分布",
+        color_discrete_map={"男生比例": "#1E88E5", "女生比例": "#0D47A1"}
+    )
+    fig1.update_layout(
+        legend=dict(
+            orientation="v",
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=1.02
+        )
+    )
+    
+    fig2 = go.Figure()
+    fig2.add_trace(go.Bar(
+        x=_major_df["专业"],
+        y=_major_df["每周平均学时"],
+        name="平均学习时间",
+        marker_color="#81D4FA",
+        yaxis="y1"
+    ))
+    fig2.add_trace(go.Scatter(
+        x=_major_df["专业"],
+        y=_major_df["期中考试平均分"],
+        name="平均期中成绩",
+        mode="lines+markers",
+        line=dict(color="#FF9800", width=2),
+        marker=dict(size=6),
+        yaxis="y2"
+    ))
+    fig2.add_trace(go.Scatter(
+        x=_major_df["专业"],
+        y=_major_df["期末考试平均分"],
+        name="平均期末成绩",
+        mode="lines+markers",
+        line=dict(color="#4CAF50", width=2),
+        marker=dict(size=6),
+        yaxis="y2"
+    ))
+    fig2.update_layout(
+        title="各专业平均学习时间与成绩对比",
+        xaxis_title="专业",
+        yaxis=dict(
+            title=dict(text="平均学习时间（小时）", font=dict(color="#81D4FA")),
+            tickfont=dict(color="#81D4FA"),
+            range=[0, 30]
+        ),
+        yaxis2=dict(
+            title=dict(text="平均分（分数）", font=dict(color="#4CAF50")),
+            tickfont=dict(color="#4CAF50"),
+            overlaying="y",
+            side="right",
+            range=[70, 90]
+        ),
+        legend=dict(
+            orientation="v",
+            yanchor="top",
+            y=1.06,
+            xanchor="left",
+            x=0,
+        ),
+        barmode="group",
+        margin=dict(l=50, r=100, t=50, b=50)
+    )
+    
+    fig3 = px.bar(
+        _major_df,
+        x="专业",
+        y="平均出勤率",
+        title="各专业平均出勤率",
+        color="平均出勤率",
+        color_continuous_scale=px.colors.sequential.YlGnBu
+    )
+    fig3.update_layout(
+        coloraxis_colorbar=dict(
+            orientation="v",
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=1.02
+        )
+    )
+    return fig1, fig2, fig3
+
+# 每个专业的分布摘要（直方图分箱计数、箱线图统计量、通过率），每个数据版本只计算一次
+# 数据与专业汇总相同（快照加上之后追加的行），追加数据后通过率和图表与平均值一致
+@st.cache_resource(max_entries=4)
+def load_major_distributions(_major_aggregates, data_fingerprint, data_version):
+    return major_distributions(_major_aggregates.distribution_rows())
+
+# 专业专项分析图表：直接用预先计算好的统计量作图，浏览器只收到几十个数字
+@st.cache_resource(max_entries=64)
+def build_drilldown_figures(major, _distributions, data_fingerprint):
+    go = timed_import("plotly.graph_objects")
+    summary = _distributions[major]
+    
+    edges = np.array(_distributions["score_edges"])
+    fig4 = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=summary["score_counts"],
+        width=np.diff(edges),
+        marker_color="#1E88E5",
+        name="期末考试分数"
+    ))
+    fig4.update_layout(
+        title=f"{major}专业期末成绩分布",
+        xaxis_title="期末考试分数", yaxis_title="count", bargap=0,
+        margin=dict(l=20, r=20, t=30, b=20)
+    )
+    
+    fig5 = go.Figure()
+    if summary["hours_box"] is not None:
+        box = summary["hours_box"]
+        fig5.add_trace(go.Box(
+            q1=[box["q1"]], median=[box["median"]], q3=[box["q3"]],
+            lowerfence=[box["lowerfence"]], upperfence=[box["upperfence"]], mean=[box["mean"]],
+            name=major,
+            marker_color="#1E88E5"
+        ))
+    fig5.update_layout(
+        title=f"{major}专业学习时长分布",
+        yaxis_title="每周学习时长（小时）", xaxis_visible=False,
+        margin=dict(l=20, r=20, t=30, b=20)
+    )
+    return fig4, fig5
+
 # 加载真实数据
-major_df, train_df, raw_df = load_real_data()
+train_df, raw_df, snapshot_meta = load_real_data()
+
+# 只读取CSV新追加的行，更新专业汇总（男女比例、各项指标平均值）
+major_aggregates = load_major_aggregates(raw_df, snapshot_meta["size"])
+major_aggregates.refresh()
+major_df = major_aggregates.major_df()
 
 # 侧边栏导航 
 st.sidebar.title("导航菜单")
@@ -91,6 +272,38 @@ page = st.sidebar.radio(
     index=0
 )
 
+# 内存占用报告：每个进程都持有这些数据，超出预算时给出提示
+memory_report = frame_memory_report({"原始数据": raw_df, "训练数据": train_df, "专业汇总": major_df})
+memory_total_mb = memory_report["内存(MB)"].sum()
+with st.sidebar.expander("💾 内存占用"):
+    st.write(f"**合计：{memory_total_mb:.2f} MB（预算 {MEMORY_BUDGET_MB:.0f} MB）**")
+    st.dataframe(memory_report, hide_index=True)
+if memory_total_mb > MEMORY_BUDGET_MB:
+    st.sidebar.warning(f"⚠️ 数据占用内存 {memory_total_mb:.1f} MB，超出预算 {MEMORY_BUDGET_MB:.0f} MB")
+
+# CSV中追加了格式错误的行：这些行已被跳过，不影响其他数据
+if major_aggregates.skipped_lines:
+    st.sidebar.warning(
+        f"⚠️ {DATA_FILE} 中有 {major_aggregates.skipped_lines} 行格式错误，已跳过"
+        f"（最后一行：{major_aggregates.last_bad_line}）"
+    )
+
+# 导入耗时报告：重量级模块只在用到它的页面才导入
+with st.sidebar.expander("⏱️ 导入耗时"):
+    if IMPORT_TIMES:
+        st.write("**本进程按需导入的模块**")
+        st.dataframe(
+            pd.DataFrame(
+                [(name, round(seconds * 1000, 1)) for name, seconds in IMPORT_TIMES.items()],
+                columns=["模块", "首次导入耗时(ms)"]
+            ),
+            hide_index=True
+        )
+    if st.button("测量冷启动导入耗时"):
+        cold_report = load_cold_import_report()
+        st.write(f"**冷启动合计：{cold_report['累计耗时(ms)'].sum():.0f} ms**")
+        st.dataframe(cold_report.head(10), hide_index=True)
+
 # 项目介绍页面 
 if page == "项目介绍":
     st.title("📚 学生成绩分析与预测系统")
@@ -144,29 +357,14 @@ if page == "项目介绍":
 elif page == "专业数据分析":
     st.title("📈 专业数据分析")
     
+    # 图表按数据指纹缓存（plotly 也只在构建图表时才按需导入）
+    fig1, fig2, fig3 = build_major_figures(major_df, frame_fingerprint(major_df))
+    
     # 模块1：各专业男女性别比例
     st.subheader("1. 各专业男女性别比例")
     col1_1, col1_2 = st.columns([0.7, 0.3])
     
     with col1_1:
-        fig1 = px.bar(
-            major_df,
-            x="专业",
-            y=["男生比例", "女生比例"],
-            barmode="group",
-            labels={"value": "比例", "variable": "性别"},
-            title="各专业性别比例分布",
-            color_discrete_map={"男生比例": "#1E88E5", "女生比例": "#0D47A1"}
-        )
-        fig1.update_layout(
-            legend=dict(
-                orientation="v",
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=1.02
-            )
-        )
         st.plotly_chart(fig1, use_container_width=True)
     
     with col1_2:
@@ -182,57 +380,6 @@ elif page == "专业数据分析":
     col2_1, col2_2 = st.columns([0.7, 0.3])
     
     with col2_1:
-        fig2 = go.Figure()
-        fig2.add_trace(go.Bar(
-            x=major_df["专业"],
-            y=major_df["每周平均学时"],
-            name="平均学习时间",
-            marker_color="#81D4FA",
-            yaxis="y1"
-        ))
-        fig2.add_trace(go.Scatter(
-            x=major_df["专业"],
-            y=major_df["期中考试平均分"],
-            name="平均期中成绩",
-            mode="lines+markers",
-            line=dict(color="#FF9800", width=2),
-            marker=dict(size=6),
-            yaxis="y2"
-        ))
-        fig2.add_trace(go.Scatter(
-            x=major_df["专业"],
-            y=major_df["期末考试平均分"],
-            name="平均期末成绩",
-            mode="lines+markers",
-            line=dict(color="#4CAF50", width=2),
-            marker=dict(size=6),
-            yaxis="y2"
-        ))
-        fig2.update_layout(
-            title="各专业平均学习时间与成绩对比",
-            xaxis_title="专业",
-            yaxis=dict(
-                title=dict(text="平均学习时间（小时）", font=dict(color="#81D4FA")),
-                tickfont=dict(color="#81D4FA"),
-                range=[0, 30]
-            ),
-            yaxis2=dict(
-                title=dict(text="平均分（分数）", font=dict(color="#4CAF50")),
-                tickfont=dict(color="#4CAF50"),
-                overlaying="y",
-                side="right",
-                range=[70, 90]
-            ),
-            legend=dict(
-                orientation="v",
-                yanchor="top",
-                y=1.06,
-                xanchor="left",
-                x=0,
-            ),
-            barmode="group",
-            margin=dict(l=50, r=100, t=50, b=50)
-        )
         st.plotly_chart(fig2, use_container_width=True)
     
     with col2_2:
@@ -252,23 +399,6 @@ elif page == "专业数据分析":
     col3_1, col3_2 = st.columns([0.7, 0.3])
     
     with col3_1:
-        fig3 = px.bar(
-            major_df,
-            x="专业",
-            y="平均出勤率",
-            title="各专业平均出勤率",
-            color="平均出勤率",
-            color_continuous_scale=px.colors.sequential.YlGnBu
-        )
-        fig3.update_layout(
-            coloraxis_colorbar=dict(
-                orientation="v",
-                yanchor="top",
-                y=0.99,
-                xanchor="left",
-                x=1.02
-            )
-        )
         st.plotly_chart(fig3, use_container_width=True)
     
     with col3_2:
@@ -282,51 +412,41 @@ elif page == "专业数据分析":
     
     st.divider()
     
-    # 模块4：大数据管理专业专项分析
-    st.subheader("4. 大数据管理专业专项分析")
-    bigdata_raw = raw_df[raw_df["专业"].str.contains("大数据", na=False)].copy()
-    bigdata_mask = major_df["专业"].str.contains("大数据", na=False)
+    # 模块4：专业专项分析（默认展示大数据管理专业，可切换为任意专业）
+    st.subheader("4. 专业专项分析")
+    distributions_version = major_aggregates.version
+    distributions = load_major_distributions(major_aggregates, snapshot_meta["sha256"], distributions_version)
+    drilldown_majors = [major for major in major_df["专业"] if major in distributions]
+    default_major = next((i for i, major in enumerate(drilldown_majors) if "大数据" in major), 0)
     
-    if bigdata_mask.any() and not bigdata_raw.empty:
-        bigdata_df = major_df[bigdata_mask].iloc[0]
+    if drilldown_majors:
+        selected_major = st.selectbox("选择专业", drilldown_majors, index=default_major)
+        selected_df = major_df[major_df["专业"] == selected_major].iloc[0]
+        fig4, fig5 = build_drilldown_figures(
+            selected_major, distributions, f"{snapshot_meta['sha256']}:{distributions_version}"
+        )
         
         # 指标卡片
         col4_1, col4_2, col4_3, col4_4 = st.columns(4)
         with col4_1:
             st.write("平均出勤率")
-            st.metric(label="", value=f"{bigdata_df['平均出勤率']:.1%}", delta=None)
+            st.metric(label="", value=f"{selected_df['平均出勤率']:.1%}", delta=None)
         with col4_2:
             st.write("平均期末分数")
-            st.metric(label="", value=f"{bigdata_df['期末考试平均分']:.1f}分", delta=None)
+            st.metric(label="", value=f"{selected_df['期末考试平均分']:.1f}分", delta=None)
         with col4_3:
-            pass_rate = (bigdata_raw["期末考试分数"] >= 60).mean()
             st.write("通过率")
-            st.metric(label="", value=f"{pass_rate:.1%}", delta=None)
+            st.metric(label="", value=f"{distributions[selected_major]['pass_rate']:.1%}", delta=None)
         with col4_4:
             st.write("平均学习时长")
-            st.metric(label="", value=f"{bigdata_df['每周平均学时']:.1f}小时", delta=None)
+            st.metric(label="", value=f"{selected_df['每周平均学时']:.1f}小时", delta=None)
         
         # 专项图表
         col4_5, col4_6 = st.columns(2)
         with col4_5:
-            fig4 = px.histogram(
-                bigdata_raw,
-                x="期末考试分数",
-                title="大数据管理专业期末成绩分布",
-                color_discrete_sequence=["#1E88E5"],
-                nbins=20
-            )
-            fig4.update_layout(xaxis_title="期末考试分数", yaxis_title="count", margin=dict(l=20, r=20, t=30, b=20))
             st.plotly_chart(fig4, use_container_width=True)
         
         with col4_6:
-            fig5 = px.box(
-                bigdata_raw,
-                y="每周学习时长（小时）",
-                title="大数据管理专业学习时长分布",
-                color_discrete_sequence=["#1E88E5"]
-            )
-            fig5.update_layout(yaxis_title="每周学习时长（小时）", xaxis_visible=False, margin=dict(l=20, r=20, t=30, b=20))
             st.plotly_chart(fig5, use_container_width=True)
         
 
@@ -358,43 +478,41 @@ elif page == "成绩预测":
             st.error("❌ 请填写完整的学号、性别、专业信息！")
         else:
             try:
-                # 加载保存的模型
-                with open('score_model.pkl', 'rb') as f:
-                    model = pickle.load(f)
+                model = get_score_model()
+                score_cube = get_score_cube() if USE_SCORE_CUBE else None
                 
-                # 准备输入特征
-                input_features = {
-                    '每周学习时长（小时）': study_hours,
-                    '上课出勤率': attendance_slider / 100.0,
-                    '作业完成率': homework_slider / 100.0,
-                    '期中考试分数': mid_score
-                }
-                
-                # 转换为模型需要的DataFrame格式
-                input_df = pd.DataFrame([input_features])
-                
-                # 预测并修正范围
-                pred_score = model.predict(input_df)[0]
-                pred_score = np.clip(pred_score, 0, 100)
-                
-                # 成绩等级评估
-                if pred_score < 60:
-                    grade = "不及格"
-                    grade_desc = "需要紧急提升"
-                elif 60 <= pred_score < 80:
-                    grade = "及格"
-                    grade_desc = "表现合格，仍有提升空间"
-                elif 80 <= pred_score < 90:
-                    grade = "良好"
-                    grade_desc = "表现不错，继续保持"
+                if score_cube is not None:
+                    # 滑块的整数值直接作为下标查表，不需要调用模型；等级由模型的原始预测值算出
+                    pred_score, grade = score_cube.lookup(study_hours, attendance_slider, homework_slider, mid_score)
                 else:
-                    grade = "优秀"
-                    grade_desc = "表现优异，值得称赞"
+                    # 准备输入特征
+                    input_features = {
+                        '每周学习时长（小时）': study_hours,
+                        '上课出勤率': attendance_slider / 100.0,
+                        '作业完成率': homework_slider / 100.0,
+                        '期中考试分数': mid_score
+                    }
+                    
+                    # 预测并修正范围（单个样本直接做点积，不需要构造DataFrame）
+                    pred_score = model.predict_row(input_features)
+                    pred_score = np.clip(pred_score, 0, 100)
+                    # 成绩等级评估：<60 不及格，60~80 及格，80~90 良好，>=90 优秀
+                    grade = str(grade_labels(pred_score))
                 
                 #  匹配图片的展示布局 
                 st.subheader("预测结果")
                 # 1. 预测分数
                 st.metric("预测期末成绩:", f"{pred_score:.1f}分")
+                model_meta = model_info(SCORE_MODEL_FILE)
+                st.caption(f"模型版本：{model_meta['version']}，加载时间：{model_meta['loaded_at']:%Y-%m-%d %H:%M:%S}")
+                
+                # 2. 达到优秀需要的学习时长（在立方体中沿学习时长一列查找）
+                if score_cube is not None and grade != "优秀":
+                    need_hours = score_cube.min_hours("优秀", attendance_slider, homework_slider, mid_score)
+                    if need_hours is None:
+                        st.info(f"🎯 保持其他条件不变，每周学习{CUBE_AXES['每周学习时长（小时）'][0]}小时仍达不到优秀，需要同时提高出勤率、作业完成率或期中成绩")
+                    else:
+                        st.info(f"🎯 保持其他条件不变，每周学习至少 {need_hours} 小时即可达到优秀")
                 
                 
                 # 3. 对应等级的图片
@@ -463,6 +581,43 @@ elif page == "成绩预测":
                     """)
                     
             except FileNotFoundError:
-                st.error("❌ 未找到模型文件 score_model.pkl，请先运行save_score_model.py生成模型")
+                st.error("❌ 未找到模型文件 score_model.json，请先运行predict_score_model.py生成模型")
             except Exception as e:
                 st.error(f"❌ 预测出错：{str(e)}")
+
+    st.divider()
+    
+    # 批量预测：上传整个班级/年级的数据，一次性预测所有学生
+    st.subheader("📂 批量预测")
+    st.write(f"上传包含 {'、'.join(FEATURE_COLS)} 四列的CSV或Excel文件（出勤率、作业完成率为0~1之间的小数），系统将一次性预测所有学生的期末成绩")
+    batch_file = st.file_uploader("上传学生数据文件", type=["csv", "xlsx"])
+    
+    if batch_file is not None:
+        try:
+            # 先获取一次模型，保证版本信息是最新的
+            get_score_model()
+            result_df, result_csv = predict_batch_file(
+                batch_file.getvalue(), batch_file.name, model_info(SCORE_MODEL_FILE)['version']
+            )
+            
+            st.success(f"✅ 已完成 {len(result_df)} 名学生的成绩预测")
+            grade_count = result_df["成绩等级"].value_counts().reindex(["不及格", "及格", "良好", "优秀"], fill_value=0)
+            col_grade1, col_grade2, col_grade3, col_grade4 = st.columns(4)
+            for col_grade, (grade_name, grade_num) in zip(
+                [col_grade1, col_grade2, col_grade3, col_grade4], grade_count.items()
+            ):
+                with col_grade:
+                    st.metric(grade_name, f"{grade_num}人")
+            
+            # 预览前100行，完整结果通过下载按钮获取
+            st.dataframe(result_df.head(100), use_container_width=True, hide_index=True)
+            st.download_button(
+                "下载预测结果",
+                data=result_csv,
+                file_name="成绩预测结果.csv",
+                mime="text/csv"
+            )
+        except FileNotFoundError:
+            st.error("❌ 未找到模型文件 score_model.json，请先运行predict_score_model.py生成模型")
+        except Exception as e:
+            st.error(f"❌ 批量预测出错：{str(e)}")
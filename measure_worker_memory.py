@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# 每种加载方式启动的工作进程数，可用 --workers 覆盖
+DEFAULT_WORKERS = 4
+
+# 两种加载方式：
+# pickle：每个进程各自反序列化 pkl（改造前）
+# mmap：编译后的节点数组以只读内存映射打开，线性模型读取导出的 JSON（改造后）
+MODES = ["pickle", "mmap"]
+
+# (pkl 文件, 编译后的目录)，文件不存在的模型跳过
+FORESTS = [("rfc_model.pkl", "rfc_model.forest"), ("rfr_model.pkl", "rfr_model.forest")]
+SCORE_MODEL = ("score_model.pkl", "score_model.json")
+
+
+def read_memory_kb(pid):
+    """从 /proc/<pid>/smaps_rollup 读取进程的 Rss 和 Pss（KB）"""
+    memory = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                memory[parts[0][:-1].lower()] = int(parts[1])
+    return memory
+
+
+def load_models(mode):
+    """按指定方式加载全部模型，并各预测一次，让用到的内存页真正被读入"""
+    import numpy as np
+
+    models = []
+    for pkl_path, forest_path in FORESTS:
+        if not os.path.exists(pkl_path):
+            continue
+        if mode == "pickle":
+            import pickle
+
+            with open(pkl_path, "rb") as f:
+                model = pickle.load(f)
+            model.predict(np.zeros((1, model.n_features_in_)))
+        else:
+            from forest_compiler import load_compiled
+
+            model = load_compiled(forest_path, pkl_path)
+            model.predict(np.zeros((1, len(model.feature_names))))
+        models.append(model)
+
+    pkl_path, json_path = SCORE_MODEL
+    if mode == "pickle":
+        import pickle
+
+        with open(pkl_path, "rb") as f:
+            models.append(pickle.load(f))
+    else:
+        from linear_scorer import LinearScorer
+
+        models.append(LinearScorer.load(json_path))
+    return models
+
+
+def run_worker(mode):
+    """工作进程：先完成导入，等待指令后加载模型，再等待指令退出"""
+    import warnings
+
+    import numpy as np  # noqa: F401
+    if mode == "pickle":
+        import sklearn.ensemble  # noqa: F401
+        import sklearn.linear_model  # noqa: F401
+    else:
+        import forest_compiler  # noqa: F401
+        import linear_scorer  # noqa: F401
+
+    warnings.filterwarnings("ignore")
+    print("imported", flush=True)
+    sys.stdin.readline()
+    start = time.perf_counter()
+    models = load_models(mode)
+    print(f"loaded {time.perf_counter() - start:.6f}", flush=True)
+    sys.stdin.readline()
+    del models
+
+
+def snapshot(workers):
+    rows = [read_memory_kb(worker.pid) for worker in workers]
+    return {
+        "rss_kb": round(sum(row["rss"] for row in rows) / len(rows)),
+        "pss_kb": round(sum(row["pss"] for row in rows) / len(rows)),
+    }
+
+
+def measure(mode, n_workers):
+    """
+    同时启动多个工作进程，分别在导入完成后和加载模型后读取每个进程的内存
+    Pss 把共享的物理页按进程数平摊，最能反映每多一个工作进程实际增加的内存
+    """
+    workers = [
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        for worker in workers:
+            worker.stdout.readline()
+        before = snapshot(workers)
+        for worker in workers:
+            worker.stdin.write("\n")
+            worker.stdin.flush()
+        load_times = [float(worker.stdout.readline().split()[1]) for worker in workers]
+        after = snapshot(workers)
+    finally:
+        for worker in workers:
+            worker.stdin.close()
+            worker.wait()
+    return {
+        "mode": mode,
+        "workers": n_workers,
+        "after_import": before,
+        "after_load": after,
+        "model_rss_kb": after["rss_kb"] - before["rss_kb"],
+        "model_pss_kb": after["pss_kb"] - before["pss_kb"],
+        "load_ms": round(sum(load_times) / len(load_times) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--worker"]:
+        run_worker(args[1])
+        exit(0)
+
+    # 测量多进程部署时每个工作进程的内存：python measure_worker_memory.py [--workers 4] [--output 结果.json]
+    n_workers = int(args[args.index("--workers") + 1]) if "--workers" in args else DEFAULT_WORKERS
+    results = [measure(mode, n_workers) for mode in MODES]
+
+    print(f"{n_workers} 个工作进程，每个进程的平均内存（KB）")
+    print(f"{'加载方式':<10}{'导入后Rss':>12}{'导入后Pss':>12}{'加载后Rss':>12}{'加载后Pss':>12}"
+          f"{'模型Rss':>10}{'模型Pss':>10}{'加载(ms)':>10}")
+    for result in results:
+        print(f"{result['mode']:<14}{result['after_import']['rss_kb']:>12}{result['after_import']['pss_kb']:>12}"
+              f"{result['after_load']['rss_kb']:>12}{result['after_load']['pss_kb']:>12}"
+              f"{result['model_rss_kb']:>10}{result['model_pss_kb']:>10}{result['load_ms']:>10}")
+    if "--output" in args:
+        output = args[args.index("--output") + 1]
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {output}")
@@ -0,0 +1,88 @@
+import hashlib
+import os
+import pickle
+import threading
+from datetime import datetime
+
+
+def load_pickle_bytes(data):
+    """默认的模型加载方式：反序列化 pickle 文件内容"""
+    return pickle.loads(data)
+
+
+class ModelRegistry:
+    """
+    进程内共享的模型注册表
+    - 每个模型文件在一个进程中只反序列化一次，所有会话共用同一个对象
+    - 每次获取模型时检查文件的修改时间和大小，文件被重新训练覆盖后自动重新加载
+    - 新模型加载成功后才整体替换旧模型，加载失败时继续使用旧模型
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _load(self, path, loader):
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        return {
+            "model": loader(data),
+            "path": path,
+            "version": hashlib.sha256(data).hexdigest()[:12],
+            "loaded_at": datetime.now(),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+
+    def _entry(self, path, loader):
+        stat = os.stat(path)
+        entry = self._entries.get(path)
+        if entry is not None and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+
+        with self._lock:
+            # 拿到锁之后再检查一次，避免多个会话同时重复加载
+            entry = self._entries.get(path)
+            stat = os.stat(path)
+            if entry is not None and (entry["mtime_ns"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+                return entry
+            try:
+                new_entry = self._load(path, loader)
+            except Exception:
+                # 文件可能正在被训练脚本写入，先继续使用旧模型，下次再尝试
+                if entry is not None:
+                    return entry
+                raise
+            self._entries[path] = new_entry
+            return new_entry
+
+    def get(self, path, loader=load_pickle_bytes):
+        """
+        获取模型对象
+        :param path: 模型文件路径
+        :param loader: 把文件内容（bytes）转换为模型对象的函数，默认按 pickle 反序列化
+        :return: 模型对象
+        """
+        return self._entry(path, loader)["model"]
+
+    def info(self, path):
+        """返回已加载模型的元数据（版本、加载时间等），尚未加载时返回 None"""
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        return {key: value for key, value in entry.items() if key != "model"}
+
+
+# 进程级别的全局注册表：模块只会被导入一次，Streamlit 每次重新运行脚本时共用它
+registry = ModelRegistry()
+
+
+def get_model(path, loader=load_pickle_bytes):
+    """从全局注册表获取模型"""
+    return registry.get(path, loader)
+
+
+def model_info(path):
+    """从全局注册表获取模型元数据"""
+    return registry.info(path)
@@ -1,68 +1,251 @@
 import pandas as pd
-from sklearn.linear_model import LinearRegression  # 替换为线性回归模型
-from sklearn.metrics import mean_squared_error
-from sklearn.model_selection import train_test_split
 import pickle
+import os
+import sys
+import hashlib
+import json
 import numpy as np
+from atomic_io import write_atomic, write_json_atomic
+from linear_scorer import LinearScorer, check_parity, linear_artifact
+from score_schema import FEATURE_COLS, TARGET_COL, grade_labels
 
 # 读取数据文件
 csv_file_path = 'student_data_adjusted_rounded.csv'
 
-try:
-    score_df = pd.read_csv(csv_file_path)
-except FileNotFoundError:
-    print(f"错误：未找到文件 {csv_file_path}，请确认文件路径和名称是否正确！")
-    print("请确保该文件与当前脚本放在同一目录下")
-    exit(1)
+# 模型文件：score_model.json 为导出的截距和系数，score_model.pkl 为 scikit-learn 模型
+model_json_path = 'score_model.json'
+model_pkl_path = 'score_model.pkl'
 
-# 删除缺失值
-score_df.dropna(inplace=True)
+# 特征列和目标列定义
+feature_cols = FEATURE_COLS
+target_col = TARGET_COL
 
-# 打印CSV的所有列名，方便核对
-print("CSV文件中的所有列名：")
-print(score_df.columns.tolist())
+USAGE = """用法：
+  python predict_score_model.py train [--chunksize 行数]   训练模型并导出 score_model.pkl / score_model.json
+  python predict_score_model.py evaluate [数据csv]          用已保存的模型评估数据集上的误差
+  python predict_score_model.py predict 输入csv [输出csv]   批量预测，输出预测成绩和等级"""
 
-# 特征列和目标列定义
-feature_cols = [
-    '每周学习时长（小时）',
-    '上课出勤率',
-    '作业完成率',
-    '期中考试分数'
-]
-target_col = '期末考试分数'
-
-# 校验列名是否存在
-missing_cols = [col for col in feature_cols + [target_col] if col not in score_df.columns]
-if missing_cols:
-    print(f"错误：CSV文件中缺少以下列名：{missing_cols}")
-    print("请核对CSV列名后修改 feature_cols/target_col！")
-    exit(1)
-
-# 定义特征和目标变量
-features = score_df[feature_cols]
-output = score_df[target_col]
-
-# 划分训练集和测试集
-x_train, x_test, y_train, y_test = train_test_split(
-    features, output, train_size=0.8, random_state=42
-)
-
-# 构建并训练线性回归模型（核心替换）
-lr = LinearRegression()  # 线性模型，参数极少
-lr.fit(x_train, y_train)
-
-# 评估模型
-y_pred = lr.predict(x_test)
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
-print(f'模型均方根误差(RMSE): {rmse:.2f}')
-print(f'模型预测分数范围: {y_pred.min():.1f} - {y_pred.max():.1f}')
-
-# 保存模型（线性模型体积会显著减小）
-with open('score_model.pkl', 'wb') as f:
-    pickle.dump(lr, f)
-
-print('成绩预测模型保存成功！生成文件：score_model.pkl')
+
+class Predictor:
+    """
+    成绩预测器：创建时加载一次模型，之后的预测都不再读取磁盘
+    优先使用 score_model.json（NumPy 点积打分），不存在时从 score_model.pkl 读取系数
+    """
+
+    def __init__(self, json_path=None, pkl_path=None):
+        json_path = json_path or model_json_path
+        pkl_path = pkl_path or model_pkl_path
+        if os.path.exists(json_path):
+            self.scorer = LinearScorer.load(json_path)
+        else:
+            with open(pkl_path, 'rb') as f:
+                model = pickle.load(f)
+            self.scorer = LinearScorer(model.feature_names_in_, np.ravel(model.coef_), np.ravel(model.intercept_)[0])
+        self.feature_cols = self.scorer.feature_names
+
+    def _missing(self, names):
+        return [col for col in self.feature_cols if col not in names]
+
+    def predict_one(self, features):
+        """
+        单个样本预测
+        :param features: 包含特征的字典，键为 feature_cols 中的列名
+        :return: 预测的成绩
+        """
+        missing_features = self._missing(features)
+        if missing_features:
+            raise ValueError(f"缺少必要的特征：{missing_features}")
+        return self.scorer.predict_row(features)
+
+    def predict_many(self, rows):
+        """
+        批量预测，整批只校验一次特征，然后一次矩阵乘法算出全部结果
+        :param rows: DataFrame（按列名取特征）、二维数组（列顺序与 feature_cols 一致）或字典的可迭代对象
+        :return: 一维预测成绩数组
+        """
+        if isinstance(rows, pd.DataFrame):
+            missing_features = self._missing(rows.columns)
+            if missing_features:
+                raise ValueError(f"缺少必要的特征：{missing_features}")
+            return self.scorer.predict(rows[self.feature_cols])
+        if not isinstance(rows, np.ndarray):
+            rows = list(rows)
+            if rows and isinstance(rows[0], dict):
+                return self.predict_many(pd.DataFrame(rows))
+        X = np.asarray(rows, dtype=np.float64)
+        if X.size == 0:
+            return np.empty(0)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_cols):
+            raise ValueError(f"特征数组的形状为 {X.shape}，应为 (样本数, {len(self.feature_cols)})")
+        return self.scorer.predict(X)
+
+
+def train_in_memory():
+    """一次性读取整个CSV并训练，返回 (模型, 用于一致性校验的测试集特征)"""
+    from sklearn.linear_model import LinearRegression  # 替换为线性回归模型
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import train_test_split
+
+    try:
+        score_df = pd.read_csv(csv_file_path)
+    except FileNotFoundError:
+        print(f"错误：未找到文件 {csv_file_path}，请确认文件路径和名称是否正确！")
+        print("请确保该文件与当前脚本放在同一目录下")
+        exit(1)
+
+    # 删除缺失值
+    score_df.dropna(inplace=True)
+
+    # 打印CSV的所有列名，方便核对
+    print("CSV文件中的所有列名：")
+    print(score_df.columns.tolist())
+
+    # 校验列名是否存在
+    missing_cols = [col for col in feature_cols + [target_col] if col not in score_df.columns]
+    if missing_cols:
+        print(f"错误：CSV文件中缺少以下列名：{missing_cols}")
+        print("请核对CSV列名后修改 feature_cols/target_col！")
+        exit(1)
+
+    # 定义特征和目标变量
+    features = score_df[feature_cols]
+    output = score_df[target_col]
+
+    # 划分训练集和测试集
+    x_train, x_test, y_train, y_test = train_test_split(
+        features, output, train_size=0.8, random_state=42
+    )
+
+    # 构建并训练线性回归模型（核心替换）
+    lr = LinearRegression()  # 线性模型，参数极少
+    lr.fit(x_train, y_train)
+
+    # 评估模型
+    y_pred = lr.predict(x_test)
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = np.sqrt(mse)
+    print(f'模型均方根误差(RMSE): {rmse:.2f}')
+    print(f'模型预测分数范围: {y_pred.min():.1f} - {y_pred.max():.1f}')
+    return lr, x_test
+
+
+def train_streaming(chunksize, train_size=0.8, random_state=42):
+    """
+    分块读取CSV并训练，内存占用只与块大小有关，与文件总行数无关
+    - 每块只累加正规方程的充分统计量：XᵀX、Xᵀy（X 含截距列）和行数，最后求解一次
+    - 每行按固定种子的随机数划入训练集或测试集，结果与块大小无关
+    - 测试集的 RMSE 同样由测试集的 XᵀX、Xᵀy、yᵀy 求出，不需要再读一遍数据
+    :return: (模型, 用于一致性校验的第一个非空测试集块的特征)
+    """
+    from sklearn.linear_model import LinearRegression
+
+    n_params = len(feature_cols) + 1
+    train_xtx, train_xty, n_train = np.zeros((n_params, n_params)), np.zeros(n_params), 0
+    test_xtx, test_xty, test_yty, n_test = np.zeros((n_params, n_params)), np.zeros(n_params), 0.0, 0
+    rng = np.random.default_rng(random_state)
+    parity_sample = None
+
+    try:
+        chunks = pd.read_csv(csv_file_path, usecols=feature_cols + [target_col], chunksize=chunksize)
+        for chunk in chunks:
+            # 删除缺失值
+            chunk = chunk.dropna()
+            x = np.column_stack([np.ones(len(chunk)), chunk[feature_cols].to_numpy(dtype=np.float64)])
+            y = chunk[target_col].to_numpy(dtype=np.float64)
+            is_train = rng.random(len(chunk)) < train_size
+
+            x_train, y_train = x[is_train], y[is_train]
+            train_xtx += x_train.T @ x_train
+            train_xty += x_train.T @ y_train
+            n_train += len(y_train)
+
+            x_test, y_test = x[~is_train], y[~is_train]
+            test_xtx += x_test.T @ x_test
+            test_xty += x_test.T @ y_test
+            test_yty += y_test @ y_test
+            n_test += len(y_test)
+
+            if parity_sample is None or parity_sample.empty:
+                parity_sample = chunk.loc[~is_train, feature_cols]
+    except FileNotFoundError:
+        print(f"错误：未找到文件 {csv_file_path}，请确认文件路径和名称是否正确！")
+        print("请确保该文件与当前脚本放在同一目录下")
+        exit(1)
+    except ValueError as e:
+        # usecols 中的列在CSV里不存在时 read_csv 会抛出 ValueError
+        print(f"错误：{e}")
+        print("请核对CSV列名后修改 feature_cols/target_col！")
+        exit(1)
+
+    if n_train == 0 or n_test == 0:
+        print("错误：有效数据太少，无法划分训练集和测试集！")
+        exit(1)
+
+    # 求解正规方程 (XᵀX)β = Xᵀy，β[0] 为截距
+    beta = np.linalg.lstsq(train_xtx, train_xty, rcond=None)[0]
+    print(f'分块训练完成：训练集 {n_train} 行，测试集 {n_test} 行')
+
+    # 测试集误差平方和 = yᵀy - 2βᵀXᵀy + βᵀXᵀXβ
+    sse = test_yty - 2 * beta @ test_xty + beta @ test_xtx @ beta
+    rmse = np.sqrt(max(sse, 0.0) / n_test)
+    print(f'模型均方根误差(RMSE): {rmse:.2f}')
+
+    # 构造与 LinearRegression.fit 结果相同的模型对象，应用端和 score_model.pkl 的使用方式不变
+    lr = LinearRegression()
+    lr.coef_ = beta[1:]
+    lr.intercept_ = float(beta[0])
+    lr.feature_names_in_ = np.array(feature_cols, dtype=object)
+    lr.n_features_in_ = len(feature_cols)
+    return lr, parity_sample
+
+
+def save_model(lr, x_test):
+    """校验导出的打分器与模型的预测一致后，保存模型并导出截距和系数"""
+    pkl_bytes = pickle.dumps(lr)
+    model_sha256 = hashlib.sha256(pkl_bytes).hexdigest()
+    # 导出截距和系数，应用端用 NumPy 点积打分，不再需要导入 scikit-learn
+    artifact = linear_artifact(lr, source_sha256=model_sha256)
+    # 先在内存中校验再写文件，校验失败时原来的模型文件保持不变
+    scorer = LinearScorer.from_json_bytes(json.dumps(artifact))
+    max_diff = check_parity(lr, scorer, x_test)
+    if max_diff > 1e-9:
+        print(f'错误：导出的打分器与模型预测结果不一致！（最大误差 {max_diff:.3e}），模型文件未更新')
+        exit(1)
+
+    # 保存模型（线性模型体积会显著减小）
+    write_atomic(model_pkl_path, pkl_bytes)
+    print(f'成绩预测模型保存成功！生成文件：{model_pkl_path}')
+    write_json_atomic(model_json_path, artifact, indent=2)
+    print(f'导出线性打分器：{model_json_path}（与sklearn预测的最大误差 {max_diff:.3e}）')
+
+
+def evaluate(data_path):
+    """用已保存的模型对数据集整体打分，输出误差"""
+    predictor = Predictor()
+    score_df = pd.read_csv(data_path, usecols=predictor.feature_cols + [target_col]).dropna()
+    errors = predictor.predict_many(score_df) - score_df[target_col].to_numpy(dtype=np.float64)
+    print(f'评估数据：{data_path}，共 {len(score_df)} 行')
+    print(f'模型均方根误差(RMSE): {np.sqrt(np.mean(errors ** 2)):.2f}')
+    print(f'模型平均绝对误差(MAE): {np.mean(np.abs(errors)):.2f}')
+
+
+def predict_file(input_path, output_path):
+    """批量预测CSV中的每一行，输出原始数据加上预测成绩和等级"""
+    predictor = Predictor()
+    score_df = pd.read_csv(input_path)
+    # 与应用的预测页面一样把分数限制在 0~100 之间，命令行和应用得到的等级一致
+    scores = np.clip(predictor.predict_many(score_df), 0, 100)
+    # 整批检查一次特征缺失的行：这些行的预测成绩和等级留空（NaN 分数会被分到最高的等级）
+    missing_rows = score_df[predictor.feature_cols].isna().any(axis=1).to_numpy()
+    score_df['预测成绩'] = np.where(missing_rows, np.nan, scores.round(1))
+    score_df['预测等级'] = np.where(missing_rows, '', grade_labels(np.nan_to_num(scores)))
+    score_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    print(f'已预测 {len(score_df) - missing_rows.sum()} 行，结果保存到 {output_path}')
+    if missing_rows.any():
+        print(f'有 {missing_rows.sum()} 行特征值缺失，未预测（预测成绩和等级留空）')
+
+
+_default_predictor = None
 
 
 def predict_score(input_features):
@@ -71,23 +254,39 @@ def predict_score(input_features):
     :param input_features: 包含特征的字典，键为feature_cols中的列名
     :return: 预测的成绩
     """
-    # 加载模型
+    # 加载模型（只在第一次调用时读取模型文件）
+    global _default_predictor
+    if _default_predictor is None:
+        try:
+            _default_predictor = Predictor()
+        except FileNotFoundError:
+            print(f"错误：未找到模型文件 {model_pkl_path}，请先训练模型！")
+            return None
+
+    # 进行预测
     try:
-        with open('score_model.pkl', 'rb') as f:
-            model = pickle.load(f)
-    except FileNotFoundError:
-        print("错误：未找到模型文件 score_model.pkl，请先训练模型！")
-        return None
-    
-    # 转换输入为模型需要的格式
-    input_df = pd.DataFrame([input_features])
-    
-    # 检查输入特征是否完整
-    missing_features = [col for col in feature_cols if col not in input_df.columns]
-    if missing_features:
-        print(f"错误：缺少必要的特征：{missing_features}")
+        prediction = _default_predictor.predict_one(input_features)
+    except ValueError as e:
+        print(f"错误：{e}")
         return None
-    
-    # 进行预测
-    prediction = model.predict(input_df)
-    return round(prediction[0], 1)
+    return round(prediction, 1)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    # 不带子命令时与以前一样直接训练
+    command = args[0] if args and not args[0].startswith('--') else 'train'
+    if command == 'train':
+        # 分块训练模式：python predict_score_model.py train --chunksize 100000
+        if '--chunksize' in args:
+            lr, x_test = train_streaming(int(args[args.index('--chunksize') + 1]))
+        else:
+            lr, x_test = train_in_memory()
+        save_model(lr, x_test)
+    elif command == 'evaluate':
+        evaluate(args[1] if len(args) > 1 else csv_file_path)
+    elif command == 'predict' and len(args) > 1:
+        predict_file(args[1], args[2] if len(args) > 2 else 'predicted_scores.csv')
+    else:
+        print(USAGE)
+        exit(1)
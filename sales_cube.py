@@ -0,0 +1,64 @@
+import pandas as pd
+
+from sales_filter import FILTER_COLS, FilterIndex
+
+# 立方体的维度：筛选用的三个维度 + 图表分组用的两个维度
+CUBE_DIMS = FILTER_COLS + ["产品类型", "小时数"]
+CUBE_MEASURES = ["总价", "评分", "订单数"]
+
+
+def aggregate_cells(df):
+    """
+    按所有维度分组汇总：总价为销售额之和，评分为评分之和，订单数为行数
+    不排序，各维度取值按首次出现的顺序排列（与 df[列].unique() 一致）
+    """
+    return (
+        df.groupby(CUBE_DIMS, sort=False, observed=True)
+        .agg(总价=("总价", "sum"), 评分=("评分", "sum"), 订单数=("总价", "size"))
+        .reset_index()
+    )
+
+
+class SalesCube:
+    """
+    预先汇总的销售立方体
+    每个单元格对应一种 (城市, 顾客类型, 性别, 产品类型, 小时数) 组合，
+    单元格数量只取决于各维度取值的个数，与交易记录的行数无关；
+    仪表板的指标和图表都由选中的单元格求和得到
+    """
+
+    def __init__(self, df):
+        cells = aggregate_cells(df)
+        # 单元格和它的位图索引作为一个整体替换，其他会话读取时不会拿到不匹配的一对
+        self._state = (cells, FilterIndex(cells, FILTER_COLS))
+
+    @property
+    def cells(self):
+        return self._state[0]
+
+    def options(self, col):
+        return self._state[1].options(col)
+
+    def add(self, df):
+        """把新的交易记录累加到立方体中，只汇总新增的行；已有单元格的顺序不变，新组合排在后面"""
+        cells = pd.concat([self.cells, aggregate_cells(df)], ignore_index=True)
+        cells = cells.groupby(CUBE_DIMS, sort=False, observed=True)[CUBE_MEASURES].sum().reset_index()
+        self._state = (cells, FilterIndex(cells, FILTER_COLS))
+
+    def select(self, selection):
+        """
+        :param selection: {筛选列: 选中的取值列表}
+        :return: 选中的单元格（DataFrame，列为 CUBE_DIMS + 总价、评分、订单数）
+        """
+        cells, filter_index = self._state
+        return cells.iloc[filter_index.select(selection)]
+
+
+def cube_kpis(cells):
+    """
+    由单元格求出仪表板的关键指标
+    :return: (总销售额, 评分的平均值, 每单的平均销售额)
+    """
+    total_sales = cells["总价"].sum()
+    orders = cells["订单数"].sum()
+    return total_sales, cells["评分"].sum() / orders, total_sales / orders
@@ -0,0 +1,139 @@
+import io
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from sales_cube import CUBE_DIMS, SalesCube
+from tail_reader import check_field_count, parse_lines, read_complete_lines, split_header
+
+# 实时交易数据文件（模拟收银系统不断追加的交易流水），支持 .csv 和 .jsonl
+# 字段与销售数据工作表相同：订单号、分店、城市、顾客类型、性别、产品类型、单价、数量、总价、日期、时间、评分
+SALES_FEED_FILE = os.environ.get("SALES_FEED_FILE", "sales_feed.jsonl")
+# 仪表板自动刷新的间隔（秒）
+REFRESH_SECONDS = float(os.environ.get("SALES_REFRESH_SECONDS", "5"))
+# 新交易中必须是数字的字段
+SALES_MEASURES = ["单价", "数量", "总价", "评分"]
+
+
+class LiveSales:
+    """
+    销售数据 + 只追加的实时交易文件
+    - 记录已经读到的文件位置，每次刷新只解析新追加的完整行
+    - 新交易只累加到销售立方体中，不保留明细，长时间运行内存也不会增长
+    - 格式错误的行会被跳过（记录条数和最后一条），读取位置照常后移
+    - 文件变小说明被重写了，从工作簿数据重新开始
+    """
+
+    def __init__(self, base_df, feed_path):
+        self.base_df = base_df
+        self.feed_path = feed_path
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.cube = SalesCube(self.base_df)
+        self.offset = 0
+        self.header = None
+        self.new_rows = 0
+        self.skipped_lines = 0
+        self.last_bad_line = None
+
+    def _parse(self, data):
+        """解析一批新追加的行（CSV不含表头），字段数不对、缺少字段、字段为空或数值无法转换时抛出异常"""
+        if self.feed_path.lower().endswith(".csv"):
+            check_field_count(data, len(self.header))
+            new_df = pd.read_csv(io.BytesIO(data), header=None)
+            if new_df.shape[1] != len(self.header):
+                raise ValueError(f"字段数为 {new_df.shape[1]}，应为 {len(self.header)}")
+            new_df.columns = self.header
+        else:
+            new_df = pd.read_json(io.BytesIO(data), lines=True, dtype=False)
+        new_df[SALES_MEASURES] = new_df[SALES_MEASURES].apply(pd.to_numeric)
+        new_df["日期"] = pd.to_datetime(new_df["日期"])
+        # 与工作簿数据一样从时间列提取小时数
+        new_df["小时数"] = pd.to_datetime(new_df["时间"], format="%H:%M:%S").dt.hour
+        # JSON 记录缺少字段时 read_json 补空值，这样的记录不能算作一笔交易
+        if new_df[CUBE_DIMS + SALES_MEASURES + ["日期"]].isna().any(axis=None):
+            raise ValueError("有的交易缺少字段或字段为空")
+        return new_df.set_index("订单号")
+
+    def refresh(self):
+        """
+        读取交易文件中上次位置之后追加的内容，累加到立方体中
+        :return: 新增的交易条数
+        """
+        with self._lock:
+            self.refreshed_at = datetime.now()
+            if not os.path.exists(self.feed_path):
+                return 0
+            data = read_complete_lines(self.feed_path, self.offset)
+            if data is None:
+                # 文件变小说明被重写了，只能从头重新统计
+                self._reset()
+                data = read_complete_lines(self.feed_path, 0)
+            if not data:
+                return 0
+
+            start = 0
+            if self.offset == 0 and self.feed_path.lower().endswith(".csv"):
+                self.header, start = split_header(data)
+            new_frames, bad_lines = parse_lines(data[start:], self._parse)
+            # 错误的行也算作已读取，之后的刷新不会再卡在同一行上
+            self.offset += len(data)
+            if bad_lines:
+                self.skipped_lines += len(bad_lines)
+                self.last_bad_line = bad_lines[-1]
+            if not new_frames:
+                return 0
+            new_df = pd.concat(new_frames)
+            self.cube.add(new_df)
+            self.new_rows += len(new_df)
+            return len(new_df)
+
+
+def simulate_feed(base_df, feed_path, rows_per_second=5, seed=None):
+    """
+    模拟收银系统：从已有交易中随机抽样，生成新的订单号和当前时间，不断追加到交易文件
+    """
+    rng = np.random.default_rng(seed)
+    records = base_df.reset_index()
+    order_no = 0
+    while True:
+        now = datetime.now()
+        sample = records.iloc[rng.integers(0, len(records), rows_per_second)]
+        lines = []
+        for _, row in sample.iterrows():
+            order_no += 1
+            record = {
+                "订单号": f"LIVE-{now:%Y%m%d%H%M%S}-{order_no}",
+                **{col: row[col] for col in ["分店", "城市", "顾客类型", "性别", "产品类型", "单价", "数量", "总价", "评分"]},
+                "日期": f"{now:%Y-%m-%d}",
+                "时间": f"{now:%H:%M:%S}",
+            }
+            if feed_path.lower().endswith(".csv"):
+                lines.append(pd.DataFrame([record]).to_csv(index=False, header=False))
+            else:
+                lines.append(json.dumps(record, ensure_ascii=False, default=lambda value: value.item()) + "\n")
+        need_header = feed_path.lower().endswith(".csv") and not os.path.exists(feed_path)
+        with open(feed_path, "a", encoding="utf-8", newline="") as f:
+            if need_header:
+                f.write(",".join(record) + "\n")
+            f.write("".join(lines))
+        print(f"{now:%H:%M:%S} 追加 {len(lines)} 条交易到 {feed_path}", flush=True)
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    # 模拟实时交易：python sales_feed.py [交易文件] [每秒条数]
+    from sales_loader import load_sales_files, resolve_sources
+
+    feed_path = sys.argv[1] if len(sys.argv) > 1 else SALES_FEED_FILE
+    rows_per_second = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    simulate_feed(load_sales_files(resolve_sources())[0], feed_path, rows_per_second)
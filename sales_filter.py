@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 销售仪表板侧边栏的筛选维度
+FILTER_COLS = ["城市", "顾客类型", "性别"]
+
+
+class FilterIndex:
+    """
+    筛选用的位图索引
+    - 每个维度的每个取值预先计算一个按位压缩的布尔位图（每行 1 bit）
+    - 同一维度内选中的取值按位或，不同维度之间按位与，不需要再扫描字符串列
+    - 每种选择组合的结果（行号数组）按 LRU 缓存，重复的选择直接返回
+    """
+
+    def __init__(self, df, columns=FILTER_COLS, cache_size=256):
+        self.columns = list(columns)
+        self.n_rows = len(df)
+        # {列: [取值, ...]}，取值顺序与 df[列].unique() 相同
+        self.values = {}
+        # {列: {取值: 压缩后的位图}}
+        self.bitmaps = {}
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col])
+            self.values[col] = uniques.tolist()
+            self.bitmaps[col] = {value: np.packbits(codes == i) for i, value in enumerate(self.values[col])}
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_uncached)
+
+    def options(self, col):
+        return self.values[col]
+
+    def _resolve_uncached(self, selection):
+        mask = None
+        for col, values in zip(self.columns, selection):
+            # 同一维度内：选中的取值按位或；没有选中任何取值时结果为空
+            dim_mask = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for value in values:
+                bitmap = self.bitmaps[col].get(value)
+                if bitmap is not None:
+                    dim_mask |= bitmap
+            # 不同维度之间按位与
+            mask = dim_mask if mask is None else mask & dim_mask
+        rows = np.flatnonzero(np.unpackbits(mask, count=self.n_rows))
+        # 结果会被缓存并在多次调用之间共用，设为只读防止被修改
+        rows.setflags(write=False)
+        return rows
+
+    def select(self, selection):
+        """
+        :param selection: {列: 选中的取值列表}，没有出现的列视为全选
+        :return: 满足条件的行号数组（升序）
+        """
+        key = tuple(
+            tuple(sorted(selection[col])) if col in selection else tuple(sorted(self.values[col]))
+            for col in self.columns
+        )
+        return self._resolve(key)
+
+    def cache_info(self):
+        return self._resolve.cache_info()
@@ -0,0 +1,139 @@
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from columnar_cache import SNAPSHOT_DIR, load_snapshot
+
+# 销售数据来源：单个工作簿、工作簿所在的目录（例如每个分店每月一个文件），或者 glob 模式
+SALES_SOURCE = os.environ.get("SALES_SOURCE", "supermarket_sales.xlsx")
+# 并行解析工作簿的进程数，默认为CPU核心数
+MAX_WORKERS = int(os.environ.get("SALES_LOAD_WORKERS", "0")) or None
+SALES_SHEET = "销售数据"
+# 解析方式改变时修改版本号，让旧的列式快照失效
+SALES_SNAPSHOT_KEY = "sales-v1"
+
+
+def parse_sales_workbook(path):
+    """解析销售数据工作簿（只在列式快照失效时调用）"""
+    # 读取Excel文件，指定工作表、跳过首行、设置订单号为索引
+    #  read_excel()函数用于读取excel文件
+    #  sheet_name='销售数据' 表示读取名为销售数据的工作表的数据
+    #  skiprows=1 表示跳过第一行
+    #  index_col='订单号' 表示这一列作为返回的数据框索引
+    df = pd.read_excel(path,
+                       sheet_name=SALES_SHEET,
+                       skiprows=1,
+                       index_col='订单号'
+                       )
+    # 从时间列提取小时数，生成新列
+    #  df['时间'] 取出原有时间列，其中包含的交易完整时间字符串，如‘10：25：30’
+    #  pd.to_datetime 将时间列转换为datetime类型
+    #  format="%H:%M:%S" 表示指定原有字符串格式
+    #  .dt.hour 表示从转换后的数据框索引取出小时数作为新列
+    df['小时数'] = pd.to_datetime(df["时间"], format="%H:%M:%S").dt.hour
+    # 快照不保存索引，订单号先作为普通列写入
+    return df.reset_index()
+
+
+def resolve_sources(source=None):
+    """
+    把数据来源展开为工作簿路径列表（排序后）
+    :param source: 文件路径、目录（读取其中所有 .xlsx）或 glob 模式
+    """
+    source = source or SALES_SOURCE
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, "**", "*.xlsx"), recursive=True)
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        paths = glob.glob(source, recursive=True)
+    # 跳过 Excel 打开文件时生成的临时文件
+    paths = sorted(path for path in paths if not os.path.basename(path).startswith("~$"))
+    if not paths:
+        raise FileNotFoundError(f"没有找到销售数据工作簿：{source}")
+    return paths
+
+
+def source_signature(paths):
+    """所有工作簿的 (路径, 修改时间, 大小)，任何一个文件变化都会改变签名"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _snapshot_dir(path):
+    # 不同目录下可能有同名的工作簿（例如每个分店都有 2024-01.xlsx），快照按所在目录分开存放
+    directory = os.path.dirname(os.path.abspath(path))
+    return os.path.join(SNAPSHOT_DIR, "sales", hashlib.sha1(directory.encode("utf-8")).hexdigest()[:12])
+
+
+def load_one_workbook(path):
+    """
+    读取一个工作簿（工作簿没有变化时直接读取列式快照），在工作进程中运行
+    :return: (路径, DataFrame, 耗时秒)
+    """
+    start = time.perf_counter()
+    df = load_snapshot(path, parse_sales_workbook, key=SALES_SNAPSHOT_KEY, snapshot_dir=_snapshot_dir(path))
+    return path, df, time.perf_counter() - start
+
+
+def check_schemas(results):
+    """检查所有工作簿的列名和数据类型一致，不一致时抛出 ValueError 并列出有差异的文件"""
+    reference_path, reference, _ = results[0]
+    problems = []
+    for path, df, _ in results[1:]:
+        missing = [col for col in reference.columns if col not in df.columns]
+        extra = [col for col in df.columns if col not in reference.columns]
+        if missing or extra:
+            problems.append(f"{path}：缺少列 {missing}，多出列 {extra}")
+            continue
+        for col in reference.columns:
+            expected, actual = reference[col].dtype, df[col].dtype
+            # 整数列和小数列可以合并（例如某个文件的数量列有空值时会被读成小数）
+            if expected != actual and not (
+                pd.api.types.is_numeric_dtype(expected) and pd.api.types.is_numeric_dtype(actual)
+            ):
+                problems.append(f"{path}：{col} 列的类型为 {actual}，与 {reference_path} 的 {expected} 不一致")
+    if problems:
+        raise ValueError("销售数据工作簿的结构不一致：\n" + "\n".join(problems))
+
+
+def load_sales_files(paths, max_workers=None):
+    """
+    读取多个工作簿并合并：多个文件时在进程池中并行解析（解析Excel受GIL限制，多线程无法加速）
+    :return: (合并后的 DataFrame（订单号为索引）, 每个文件的读取情况 DataFrame)
+    """
+    if len(paths) == 1:
+        results = [load_one_workbook(paths[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers or MAX_WORKERS) as pool:
+            results = list(pool.map(load_one_workbook, paths))
+
+    check_schemas(results)
+    columns = results[0][1].columns
+    # 所有文件只合并一次
+    df = pd.concat([frame[columns] for _, frame, _ in results], ignore_index=True)
+    # 文件名显示为相对于共同目录的路径，区分不同分店目录下的同名文件
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    timings = pd.DataFrame(
+        [(os.path.relpath(os.path.abspath(path), root), len(frame), round(seconds, 3)) for path, frame, seconds in results],
+        columns=["文件", "行数", "读取耗时(秒)"],
+    )
+    return df.set_index("订单号"), timings
+
+
+if __name__ == "__main__":
+    # 读取销售数据并输出每个文件的读取耗时：python sales_loader.py [文件/目录/glob] [进程数]
+    import sys
+
+    paths = resolve_sources(sys.argv[1] if len(sys.argv) > 1 else None)
+    start = time.perf_counter()
+    sales_df, file_timings = load_sales_files(paths, int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    print(file_timings.to_string(index=False))
+    print(f"共 {len(paths)} 个文件，{len(sales_df)} 行，总耗时 {time.perf_counter() - start:.2f} 秒")
@@ -1,9 +1,17 @@
 # save_model.py（修正版本）
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import KFold, train_test_split
 from sklearn.metrics import r2_score
+from joblib import Parallel, delayed
+import numpy as np
+import itertools
 import pickle
+import sys
+import time
+from atomic_io import write_atomic, write_json_atomic
+from feature_encoder import FeatureEncoder
+from forest_compiler import compile_forest, sha256_file
 
 # 设置输出右对齐，防止中文不对齐
 pd.set_option('display.unicode.east_asian_width', True)
@@ -17,14 +25,99 @@ output = insurance_df['医疗费用']
 # 使用年龄、性别、BMI、子女数量、是否吸烟、区域作为特征列
 features = insurance_df[['年龄','性别','BMI','子女数量','是否吸烟','区域']]
 
-# 对特征列进行独热编码
-features = pd.get_dummies(features)
+# 对特征列进行独热编码（与 pd.get_dummies 结果相同），编码规则保存下来供应用端使用
+encoder = FeatureEncoder.fit(features)
+features = pd.DataFrame(encoder.transform(features), columns=encoder.feature_names)
 
-# 划分数据集
-x_train, x_test, y_train, y_test = train_test_split(features, output, train_size=0.8)
+# 固定随机种子，保证每次训练得到相同的数据划分和模型
+RANDOM_STATE = 42
 
-# 构建随机森林回归模型
-rfr = RandomForestRegressor()
+# 超参数搜索的网格和交叉验证折数
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [None, 8, 16],
+    'min_samples_leaf': [1, 3, 5],
+}
+K_FOLDS = 5
+REPORT_PATH = 'rfr_search_report.json'
+
+
+def evaluate_config(params, fold, train_index, test_index, x, y):
+    """训练并评估一组超参数在一折数据上的表现（在 joblib 的工作进程中运行）"""
+    model = RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=1, **params)
+    start = time.perf_counter()
+    model.fit(x.iloc[train_index], y.iloc[train_index])
+    fit_time = time.perf_counter() - start
+    result = {
+        'fold': fold,
+        'fit_time_s': fit_time,
+        'r2': r2_score(y.iloc[test_index], model.predict(x.iloc[test_index])),
+    }
+    if fold == 0:
+        # 只在第一折测量单条预测延迟和模型文件大小（与应用中逐条预测的使用方式一致）
+        one_row = x.iloc[test_index[:1]]
+        latencies = []
+        for _ in range(20):
+            start = time.perf_counter()
+            model.predict(one_row)
+            latencies.append(time.perf_counter() - start)
+        result['predict_latency_ms'] = float(np.median(latencies)) * 1000
+        result['model_size_kb'] = len(pickle.dumps(model)) / 1024
+    return params, result
+
+
+def search_params(x, y):
+    """K折交叉验证 + 网格搜索，所有 (超参数, 折) 组合通过 joblib 在全部CPU核心上并行"""
+    configs = [dict(zip(PARAM_GRID, values)) for values in itertools.product(*PARAM_GRID.values())]
+    folds = list(KFold(n_splits=K_FOLDS, shuffle=True, random_state=RANDOM_STATE).split(x))
+    jobs = Parallel(n_jobs=-1)(
+        delayed(evaluate_config)(params, fold, train_index, test_index, x, y)
+        for params in configs
+        for fold, (train_index, test_index) in enumerate(folds)
+    )
+
+    # 汇总每组超参数在各折上的结果
+    results = []
+    for params in configs:
+        folds_result = [result for job_params, result in jobs if job_params == params]
+        first_fold = next(result for result in folds_result if result['fold'] == 0)
+        r2_values = [result['r2'] for result in folds_result]
+        results.append({
+            'params': params,
+            'r2_mean': round(float(np.mean(r2_values)), 4),
+            'r2_std': round(float(np.std(r2_values)), 4),
+            'fit_time_s': round(float(np.mean([result['fit_time_s'] for result in folds_result])), 4),
+            'predict_latency_ms': round(first_fold['predict_latency_ms'], 3),
+            'model_size_kb': round(first_fold['model_size_kb'], 1),
+        })
+    results.sort(key=lambda result: result['r2_mean'], reverse=True)
+    return results
+
+
+# 划分数据集（固定随机种子）
+x_train, x_test, y_train, y_test = train_test_split(
+    features, output, train_size=0.8, random_state=RANDOM_STATE
+)
+
+# 超参数搜索模式：python save_model.py --search
+best_params = {}
+if '--search' in sys.argv:
+    search_results = search_params(x_train, y_train)
+    best_params = search_results[0]['params']
+    write_json_atomic(REPORT_PATH, {
+        'random_state': RANDOM_STATE,
+        'k_folds': K_FOLDS,
+        'param_grid': PARAM_GRID,
+        'results': search_results,
+    }, indent=2)
+    print(f'{"超参数":<52}{"R²":>8}{"训练(s)":>10}{"单条预测(ms)":>14}{"模型(KB)":>10}')
+    for result in search_results:
+        print(f'{str(result["params"]):<52}{result["r2_mean"]:>8.4f}{result["fit_time_s"]:>10.3f}'
+              f'{result["predict_latency_ms"]:>14.3f}{result["model_size_kb"]:>10.1f}')
+    print(f'搜索报告已保存到 {REPORT_PATH}，交叉验证R²最高的超参数：{best_params}')
+
+# 构建随机森林回归模型（固定随机种子，使用全部CPU核心训练）
+rfr = RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=-1, **best_params)
 
 # 训练模型
 rfr.fit(x_train, y_train)
@@ -37,8 +130,16 @@ r2 = r2_score(y_test, y_pred)
 
 print(f'模型在测试集上的R²分数为: {r2:.4f}')
 
-# 保存模型 - 注意这里改为 .pkl
-with open('rfr_model.pkl', 'wb') as f:
-    pickle.dump(rfr, f)
+# 保存的模型不带 n_jobs，应用端逐条预测时不启动线程池
+rfr.n_jobs = None
+
+# 保存模型 - 注意这里改为 .pkl（先写临时文件再整体替换）
+write_atomic('rfr_model.pkl', pickle.dumps(rfr))
+
+# 同时编译成扁平数组格式，供 streamlit_predict.py 快速逐条预测
+compile_forest(rfr).save('rfr_model.forest', source_sha256=sha256_file('rfr_model.pkl'))
+
+# 保存特征编码规则（类别取值和列顺序），应用端按同样的规则编码用户输入
+encoder.save('rfr_encoder.json')
 
-print('保存成功，已生成 rfr_model.pkl 文件。')
+print('保存成功，已生成 rfr_model.pkl、rfr_model.forest 和 rfr_encoder.json 文件。')
@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from score_schema import FEATURE_COLS, GRADE_LABELS, grade_codes
+
+# 预测结果立方体的存放目录，可用环境变量 SCORE_CUBE_DIR 修改
+CUBE_DIR = os.environ.get("SCORE_CUBE_DIR", ".score_cube")
+
+# 导出文件的格式版本，字段有变化时加一
+# 2：等级改为按模型的原始预测值计算（版本 1 按 float16 分数计算，边界附近的等级与模型不一致）
+FORMAT_VERSION = 2
+
+# 成绩预测页面的滑块都是整数，四个滑块的取值范围组成有限的网格：
+# 每周学习时长 0~50 小时，出勤率 0~100%，作业完成率 0~100%，期中考试分数 0~100
+# {特征列: (滑块的最大值, 滑块值换算成特征值的比例)}，顺序与 FEATURE_COLS 一致
+CUBE_AXES = {
+    "每周学习时长（小时）": (50, 1.0),
+    "上课出勤率": (100, 0.01),
+    "作业完成率": (100, 0.01),
+    "期中考试分数": (100, 1.0),
+}
+CUBE_SHAPE = tuple(CUBE_AXES[col][0] + 1 for col in FEATURE_COLS)
+
+
+class ScoreCube:
+    """
+    成绩预测模型在整个滑块网格上的预测结果
+    scores 为 float16 的预测分数（已限制在 0~100），grades 为 uint8 的等级编码，
+    都以只读内存映射的方式打开，预测只需要一次数组索引
+    """
+
+    def __init__(self, scores, grades, meta):
+        self.scores = scores
+        self.grades = grades
+        self.meta = meta
+
+    @classmethod
+    def load(cls, cube_dir=CUBE_DIR):
+        with open(os.path.join(cube_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的立方体文件版本：{meta.get('format_version')}")
+        scores = np.load(os.path.join(cube_dir, "scores.npy"), mmap_mode="r").view(np.ndarray)
+        grades = np.load(os.path.join(cube_dir, "grades.npy"), mmap_mode="r").view(np.ndarray)
+        return cls(scores, grades, meta)
+
+    def lookup(self, study_hours, attendance_pct, homework_pct, mid_score):
+        """按滑块的整数值查表，返回 (预测分数, 等级名称)"""
+        index = (study_hours, attendance_pct, homework_pct, mid_score)
+        return float(self.scores[index]), str(GRADE_LABELS[self.grades[index]])
+
+    def min_hours(self, grade, attendance_pct, homework_pct, mid_score):
+        """其余条件不变时，达到指定等级所需的最少每周学习时长；学习时长取到最大也达不到时返回 None"""
+        target = int(np.flatnonzero(GRADE_LABELS == grade)[0])
+        reached = self.grades[:, attendance_pct, homework_pct, mid_score] >= target
+        return int(np.argmax(reached)) if reached.any() else None
+
+
+def build_cube(model, fingerprint, cube_dir=CUBE_DIR):
+    """
+    在整个网格上批量预测并保存，每次预测一个学习时长对应的所有组合，内存占用与整个网格无关
+    先写到临时目录再整体换上，已经打开旧立方体的进程不受影响
+    临时目录名唯一，多个进程同时生成也不会写进同一个临时目录
+    """
+    from numpy.lib.format import open_memmap
+
+    parent = os.path.dirname(os.path.abspath(cube_dir))
+    tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(cube_dir) + ".tmp", dir=parent)
+    # mkdtemp 创建的目录只有自己可读，改为与普通目录相同的权限
+    os.chmod(tmp_dir, 0o755)
+    try:
+        scores = open_memmap(os.path.join(tmp_dir, "scores.npy"), mode="w+", dtype=np.float16, shape=CUBE_SHAPE)
+        grades = open_memmap(os.path.join(tmp_dir, "grades.npy"), mode="w+", dtype=np.uint8, shape=CUBE_SHAPE)
+
+        # 除学习时长外其余三个特征的所有组合
+        axes = [np.arange(CUBE_AXES[col][0] + 1) * CUBE_AXES[col][1] for col in FEATURE_COLS]
+        rest = np.stack(np.meshgrid(*axes[1:], indexing="ij"), axis=-1).reshape(-1, len(axes) - 1)
+        X = np.empty((len(rest), len(axes)))
+        X[:, 1:] = rest
+        for i, hours in enumerate(axes[0]):
+            X[:, 0] = hours
+            pred = np.clip(model.predict(X), 0, 100)
+            scores[i] = pred.astype(np.float16).reshape(CUBE_SHAPE[1:])
+            # 等级按模型的原始预测值计算，不用保存后的 float16 分数，
+            # 否则 59.9966 这样的分数会被舍入为 60.0 而评为及格，与直接调用模型的结果不一致
+            grades[i] = grade_codes(pred).reshape(CUBE_SHAPE[1:])
+        scores.flush()
+        grades.flush()
+        del scores, grades
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "feature_cols": FEATURE_COLS,
+            "shape": list(CUBE_SHAPE),
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    except BaseException:
+        # 预测或写文件失败（包括被中断）时删掉写了一半的临时目录
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    old_dir = tmp_dir + ".old"
+    if os.path.exists(cube_dir):
+        os.replace(cube_dir, old_dir)
+    try:
+        os.replace(tmp_dir, cube_dir)
+    except OSError:
+        # 其他进程刚刚换上了它生成的立方体，保留那一份
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def ensure_cube(model, fingerprint, cube_dir=CUBE_DIR):
+    """读取立方体；不存在或者由其他版本的模型生成时先重新生成"""
+    try:
+        cube = ScoreCube.load(cube_dir)
+        if cube.meta["fingerprint"] == fingerprint:
+            return cube
+    except (OSError, ValueError, KeyError):
+        pass
+    build_cube(model, fingerprint, cube_dir)
+    return ScoreCube.load(cube_dir)
+
+
+# 本进程已经打开的立方体和正在后台生成的立方体，键为 (目录, 模型指纹)
+_ready_cubes = {}
+_building = set()
+_build_lock = threading.Lock()
+
+
+def _build_in_background(model, fingerprint, cube_dir):
+    try:
+        build_cube(model, fingerprint, cube_dir)
+    finally:
+        with _build_lock:
+            _building.discard((cube_dir, fingerprint))
+
+
+def cube_if_ready(model, fingerprint, cube_dir=CUBE_DIR):
+    """
+    返回与模型版本一致的立方体；还没有生成时在后台线程中生成并返回 None，
+    调用方在生成完成之前直接调用模型，请求不会等待立方体生成
+    """
+    key = (cube_dir, fingerprint)
+    cube = _ready_cubes.get(key)
+    if cube is not None:
+        return cube
+    try:
+        cube = ScoreCube.load(cube_dir)
+        if cube.meta["fingerprint"] == fingerprint:
+            _ready_cubes[key] = cube
+            return cube
+    except (OSError, ValueError, KeyError):
+        pass
+    with _build_lock:
+        if key not in _building:
+            _building.add(key)
+            threading.Thread(target=_build_in_background, args=(model, fingerprint, cube_dir), daemon=True).start()
+    return None
+
+
+if __name__ == "__main__":
+    # 生成并校验预测立方体：python score_cube.py [模型json]
+    from model_registry import get_model, model_info
+    from linear_scorer import LinearScorer
+
+    model_path = sys.argv[1] if len(sys.argv) > 1 else "score_model.json"
+    scorer = get_model(model_path, LinearScorer.from_json_bytes)
+    start = time.perf_counter()
+    cube = ensure_cube(scorer, model_info(model_path)["version"])
+    print(f"立方体 {CUBE_DIR}：形状 {CUBE_SHAPE}，"
+          f"{(cube.scores.nbytes + cube.grades.nbytes) / 1024 ** 2:.1f} MB，耗时 {time.perf_counter() - start:.2f} 秒")
+
+    # 随机抽取网格点，与模型直接预测的结果对比
+    rng = np.random.default_rng(0)
+    index = tuple(rng.integers(0, size, 100000) for size in CUBE_SHAPE)
+    X = np.column_stack([index[i] * CUBE_AXES[col][1] for i, col in enumerate(FEATURE_COLS)])
+    expected = np.clip(scorer.predict(X), 0, 100)
+    max_diff = float(np.max(np.abs(cube.scores[index].astype(np.float64) - expected)))
+    grade_diff = int(np.count_nonzero(cube.grades[index] != grade_codes(expected)))
+    print(f"抽样校验：{len(expected)} 个网格点，与模型预测的最大误差 {max_diff:.4f}，等级不一致 {grade_diff} 个")
+    # float16 在 0~100 之间的精度为 1/16；等级必须完全一致
+    if max_diff > 0.05 or grade_diff:
+        print("错误：立方体与模型的预测结果不一致！")
+        exit(1)
+    print("校验通过")
@@ -0,0 +1,24 @@
+import numpy as np
+
+# 成绩预测模型的特征列和目标列（顺序与训练时一致）
+FEATURE_COLS = [
+    '每周学习时长（小时）',
+    '上课出勤率',
+    '作业完成率',
+    '期中考试分数'
+]
+TARGET_COL = '期末考试分数'
+
+# 成绩等级划分：<60 不及格，60~80 及格，80~90 良好，>=90 优秀
+GRADE_BINS = np.array([60, 80, 90])
+GRADE_LABELS = np.array(["不及格", "及格", "良好", "优秀"])
+
+
+def grade_codes(scores):
+    """把预测分数数组一次性映射为等级编码（0~3），代替逐个 if/elif 判断"""
+    return np.digitize(scores, GRADE_BINS).astype(np.uint8)
+
+
+def grade_labels(scores):
+    """把预测分数数组一次性映射为等级名称"""
+    return GRADE_LABELS[grade_codes(scores)]
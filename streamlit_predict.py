@@ -1,6 +1,75 @@
 import streamlit as st
-import pickle
+import os
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+from feature_encoder import FeatureEncoder
+from forest_compiler import load_compiled
+
+
+@st.cache_resource
+def load_model(pkl_mtime):
+    """
+    读取编译成数组的随机森林模型和训练时保存的特征编码器，所有会话共用一份
+    rfr_model.pkl 重新训练后修改时间变化，会直接从 pkl 在内存中重新编译（不写文件）
+    """
+    rfr_model = load_compiled('rfr_model.forest', 'rfr_model.pkl')
+    encoder = FeatureEncoder.load('rfr_encoder.json')
+    if encoder.feature_names != rfr_model.feature_names:
+        raise ValueError('rfr_encoder.json 与 rfr_model.pkl 的特征不一致，请重新运行 save_model.py')
+    return rfr_model, encoder
+
+
+# 假设分析的网格：年龄 18~80 岁每一岁，BMI 15~50 每 0.5 一档，吸烟和不吸烟
+WHATIF_AGES = np.arange(18, 81)
+WHATIF_BMIS = np.arange(15.0, 50.5, 0.5)
+WHATIF_SMOKE = ['是', '否']
+
+
+@st.cache_data
+def score_whatif_grid(sex, children, region, pkl_mtime):
+    """
+    对 年龄 × BMI × 是否吸烟 的整个网格一次性批量预测（其余特征取当前客户的值）
+    同一个客户只计算一次，拖动滑块时直接从结果数组中取曲线
+    :return: 数组，形状为 (吸烟取值数, 年龄数, BMI数)
+    """
+    rfr_model, encoder = load_model(pkl_mtime)
+    smoke, age, bmi = np.meshgrid(WHATIF_SMOKE, WHATIF_AGES, WHATIF_BMIS, indexing='ij')
+    grid_df = pd.DataFrame({
+        '年龄': age.ravel(), '性别': sex, 'BMI': bmi.ravel(),
+        '子女数量': children, '是否吸烟': smoke.ravel(), '区域': region,
+    })
+    return rfr_model.predict(encoder.transform(grid_df)).reshape(smoke.shape)
+
+
+def whatif_panel(profile):
+    """假设分析：医疗费用随年龄、BMI 变化的曲线，吸烟和不吸烟各一条"""
+    st.markdown("## 假设分析")
+    st.caption("其余信息保持不变，查看预测费用随年龄或BMI的变化")
+    grid = score_whatif_grid(
+        profile['性别'], profile['子女数量'], profile['区域'], os.path.getmtime('rfr_model.pkl')
+    )
+    default_age = int(np.clip(profile['年龄'], WHATIF_AGES[0], WHATIF_AGES[-1]))
+    default_bmi = float(np.clip(round(profile['BMI'] * 2) / 2, WHATIF_BMIS[0], WHATIF_BMIS[-1]))
+
+    col_age, col_bmi = st.columns(2)
+    with col_age:
+        fixed_bmi = st.slider('BMI固定为', float(WHATIF_BMIS[0]), float(WHATIF_BMIS[-1]), default_bmi, step=0.5)
+        bmi_index = int(round((fixed_bmi - WHATIF_BMIS[0]) / 0.5))
+        fig = go.Figure()
+        for i, smoke in enumerate(WHATIF_SMOKE):
+            fig.add_trace(go.Scatter(x=WHATIF_AGES, y=grid[i, :, bmi_index], mode='lines', name=f'吸烟：{smoke}'))
+        fig.update_layout(title=f'医疗费用随年龄的变化（BMI={fixed_bmi}）', xaxis_title='年龄', yaxis_title='医疗费用')
+        st.plotly_chart(fig, use_container_width=True)
+    with col_bmi:
+        fixed_age = st.slider('年龄固定为', int(WHATIF_AGES[0]), int(WHATIF_AGES[-1]), default_age)
+        age_index = fixed_age - WHATIF_AGES[0]
+        fig = go.Figure()
+        for i, smoke in enumerate(WHATIF_SMOKE):
+            fig.add_trace(go.Scatter(x=WHATIF_BMIS, y=grid[i, age_index, :], mode='lines', name=f'吸烟：{smoke}'))
+        fig.update_layout(title=f'医疗费用随BMI的变化（年龄={fixed_age}）', xaxis_title='BMI', yaxis_title='医疗费用')
+        st.plotly_chart(fig, use_container_width=True)
+
 
 def introduce_page():
     """当选择简介页面时，将呈现该函数的内容"""
@@ -52,47 +121,24 @@ def predict_page():
         submitted = st.form_submit_button('预测费用')
     
     if submitted:
-        format_data=[age,sex,bmi,children,smoke,region]
-        # 初始化数据预处理格式中与岛屿相关的变量
-        sex_female, sex_male = 0, 0
-        # 根据用户输入的性别数据更改对应的值
-        if sex == '女性':
-            sex_female = 1
-        elif sex == '男性':
-            sex_male = 1
-
-        smoke_yes, smoke_no = 0, 0
-        # 根据用户输入的吸烟数据更改对应的值
-        if smoke == '是':
-            smoke_yes = 1
-        elif smoke == '否':
-            smoke_no = 1
-
-        region_northeast, region_southeast, region_northwest, region_southwest = 0, 0, 0, 0
-        # 根据用户输入的岛屿数据更改对应的值
-        if region == '东北部':
-            region_northeast = 1
-        elif region == '东南部':
-            region_southeast = 1
-        elif region == '西北部':
-            region_northwest = 1
-        elif region == '西南部':
-            region_southwest = 1
-
-        format_data = [age, bmi, children, sex_female, sex_male,
-                       smoke_no, smoke_yes,
-                       region_northeast, region_southeast, region_northwest, region_southwest]
-
-        # 使用 pickle 的 load 方法从磁盘文件反序列化加载一个之前保存的随机森林回归模型
-        with open('rfr_model.pkl', 'rb') as f:
-            rfr_model = pickle.load(f)
-        if submitted:
-            format_data_df = pd.DataFrame([format_data], columns=rfr_model.feature_names_in_)
+        # 加载编译后的随机森林回归模型和特征编码器
+        rfr_model, encoder = load_model(os.path.getmtime('rfr_model.pkl'))
+        profile = {
+            '年龄': age, '性别': sex, 'BMI': bmi,
+            '子女数量': children, '是否吸烟': smoke, '区域': region,
+        }
+        # 按训练时保存的编码规则把输入转换成模型的特征（独热编码、列顺序与训练时一致）
+        format_data = encoder.transform_row(profile)
         # 使用模型对格式化后的数据 format_data 进行预测，返回预测的医疗费用
-        predict_result = rfr_model.predict(format_data_df)[0]
-        
-        st.write('根据您输入的数据，预测该客户的医疗费用是：', round(predict_result, 2))
+        predict_result = rfr_model.predict_row(format_data)
+        # 记住本次输入，拖动假设分析的滑块重新运行页面时仍然显示结果
+        st.session_state['last_profile'] = profile
+        st.session_state['last_result'] = predict_result
+
+    if 'last_profile' in st.session_state:
+        st.write('根据您输入的数据，预测该客户的医疗费用是：', round(st.session_state['last_result'], 2))
         st.write("技术支持: email:: support@example.com")
+        whatif_panel(st.session_state['last_profile'])
 
 # 设置页面的标题、图标
 st.set_page_config(
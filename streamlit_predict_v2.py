@@ -1,7 +1,22 @@
 
 import streamlit as st
+import os
 import pickle
-import pandas as pd
+from forest_compiler import load_compiled
+
+
+@st.cache_resource
+def load_model(pkl_mtime):
+    """
+    读取编译成数组的随机森林模型和类别名称，所有会话共用一份
+    rfc_model.pkl 重新训练后修改时间变化，缓存键随之变化，会重新读取模型
+    """
+    rfc_model = load_compiled('rfc_model.forest', 'rfc_model.pkl')
+    # 使用pickle的load方法从磁盘文件反序列化加载一个之前保存的映射对象
+    with open('output_uniques.pkl', 'rb') as f:
+        output_uniques_map = pickle.load(f)
+    return rfc_model, output_uniques_map
+
 
 # 设置页面的标题、图标和布局
 st.set_page_config(
@@ -68,21 +83,15 @@ if page == "预测分类页面":
     format_data = [bill_length, bill_depth, flipper_length, body_mass, island_dream, 
                   island_torgerson, island_biscoe, sex_male, sex_female]
     
-    # 使用pickle的load方法从磁盘文件反序列化加载一个之前保存的随机森林模型对象
-    with open('rfc_model.pkl', 'rb') as f:
-        rfc_model = pickle.load(f)
-    
-    # 使用pickle的load方法从磁盘文件反序列化加载一个之前保存的映射对象
-    with open('output_uniques.pkl', 'rb') as f:
-        output_uniques_map = pickle.load(f)
+    # 加载编译后的随机森林模型和类别名称（只在第一次运行或 rfc_model.pkl 更新后读取磁盘）
+    rfc_model, output_uniques_map = load_model(os.path.getmtime('rfc_model.pkl'))
     
     # 如果表单已提交，则进行预测
     if submitted:
         # 使用模型对格式化后的数据 format_data 进行预测，返回预测的类别代码
-        format_data_df = pd.DataFrame(data=[format_data], columns=rfc_model.feature_names_in_)
-        predict_result_code = rfc_model.predict(format_data_df)
+        predict_result_code = rfc_model.predict_row(format_data)
         # 将类别代码映射到具体的类别名称
-        predict_result_species = output_uniques_map[predict_result_code][0]
+        predict_result_species = output_uniques_map[predict_result_code]
         
         st.write(f'根据您输入的数据，预测该企鹅的物种名称是：**{predict_result_species}**')
     
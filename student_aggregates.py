@@ -0,0 +1,229 @@
+import hashlib
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+
+from tail_reader import check_field_count, parse_lines, read_complete_lines, split_header
+
+# 专业汇总用到的学习指标，顺序与原来 groupby.agg 的顺序一致
+METRIC_COLS = [
+    "每周学习时长（小时）",
+    "上课出勤率",
+    "期中考试分数",
+    "期末考试分数",
+    "作业完成率",
+]
+
+# 汇总结果的列名映射，与页面上使用的列名保持一致
+RENAME_COLS = {
+    "每周学习时长（小时）": "每周平均学时",
+    "期中考试分数": "期中考试平均分",
+    "期末考试分数": "期末考试平均分",
+    "上课出勤率": "平均出勤率",
+    "作业完成率": "作业完成率",
+}
+
+# 专业专项分析的分布摘要（major_distributions）用到的列
+DISTRIBUTION_COLS = ["专业", "期末考试分数", "每周学习时长（小时）"]
+
+
+def frame_fingerprint(df):
+    """计算 DataFrame 内容的指纹，内容不变时指纹不变，可用作缓存键"""
+    row_hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _plain_labels(frame):
+    """把 category 类型的行/列标签转换为普通标签，使快照数据和新追加的数据可以直接相加"""
+    if isinstance(frame.index, pd.CategoricalIndex):
+        frame.index = frame.index.astype(object)
+    if isinstance(frame.columns, pd.CategoricalIndex):
+        frame.columns = frame.columns.astype(object)
+    return frame
+
+
+class MajorAggregates:
+    """
+    按专业增量维护的汇总状态
+    - 每个专业每种性别的人数
+    - 每个专业每个学习指标的累加和与非空个数（用来求平均值）
+    - 已累加的每批数据中计算分布摘要用到的列：直方图和箱线图的分位数无法增量累加，
+      数据有变化时用这些行重新计算，与平均值覆盖同样的数据
+    - 已经读取到的CSV字节位置：刷新时只读取之后追加的完整行
+    - 格式错误的行会被跳过（记录条数和最后一条），读取位置照常后移
+    """
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.offset = 0
+        self.header = None
+        self.gender_counts = pd.DataFrame(dtype="float64")
+        self.metric_sums = pd.DataFrame(columns=METRIC_COLS, dtype="float64")
+        self.metric_counts = pd.DataFrame(columns=METRIC_COLS, dtype="float64")
+        self.distribution_frames = []
+        self.version = 0
+        self.skipped_lines = 0
+        self.last_bad_line = None
+        self._major_df = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, csv_path, df, offset):
+        """用已经读取好的数据（例如列式快照）初始化，offset 为这些数据对应的CSV字节数"""
+        aggregates = cls(csv_path)
+        aggregates.header = aggregates._read_header()
+        aggregates._fold(df)
+        aggregates.offset = offset
+        return aggregates
+
+    def _read_header(self):
+        with open(self.csv_path, "r", encoding="utf-8") as f:
+            return f.readline().strip().split(",")
+
+    def _reset(self):
+        self.offset = 0
+        self.header = None
+        self.gender_counts = pd.DataFrame(dtype="float64")
+        self.metric_sums = pd.DataFrame(columns=METRIC_COLS, dtype="float64")
+        self.metric_counts = pd.DataFrame(columns=METRIC_COLS, dtype="float64")
+        self.distribution_frames = []
+
+    def _parse(self, data):
+        """解析一批新追加的行（不含表头），字段数不对、专业或性别为空、指标不是数字时抛出 ValueError"""
+        check_field_count(data, len(self.header))
+        new_rows = pd.read_csv(io.BytesIO(data), header=None)
+        if new_rows.shape[1] != len(self.header):
+            raise ValueError(f"字段数为 {new_rows.shape[1]}，应为 {len(self.header)}")
+        new_rows.columns = self.header
+        if new_rows[["专业", "性别"]].isna().any(axis=None):
+            raise ValueError("专业或性别为空")
+        new_rows[METRIC_COLS] = new_rows[METRIC_COLS].apply(pd.to_numeric)
+        return new_rows
+
+    def _fold(self, df):
+        """把一批新数据累加到汇总状态中，只需要 O(新行数) 的计算量"""
+        gender_counts = df.groupby("专业", observed=True)["性别"].value_counts().unstack(fill_value=0)
+        self.gender_counts = self.gender_counts.add(_plain_labels(gender_counts), fill_value=0).fillna(0)
+
+        # 快照中的指标是 float32，累加时统一用 float64，避免大量数据求和的精度损失
+        grouped = df[METRIC_COLS].astype("float64").groupby(df["专业"], observed=True)
+        self.metric_sums = self.metric_sums.add(_plain_labels(grouped.sum()), fill_value=0)
+        self.metric_counts = self.metric_counts.add(_plain_labels(grouped.count()), fill_value=0)
+        self.distribution_frames.append(df[DISTRIBUTION_COLS])
+        self.version += 1
+        self._major_df = None
+
+    def refresh(self):
+        """
+        读取CSV中上次位置之后追加的内容并累加到汇总中
+        :return: 是否有新数据
+        """
+        with self._lock:
+            data = read_complete_lines(self.csv_path, self.offset)
+            if data is None:
+                # 文件变小说明被重写了，只能从头重新统计
+                self._reset()
+                data = read_complete_lines(self.csv_path, 0)
+            if not data:
+                return False
+
+            start = 0
+            if self.offset == 0:
+                self.header, start = split_header(data)
+            new_frames, bad_lines = parse_lines(data[start:], self._parse)
+            # 错误的行也算作已读取，之后的刷新不会再卡在同一行上
+            self.offset += len(data)
+            if bad_lines:
+                self.skipped_lines += len(bad_lines)
+                self.last_bad_line = bad_lines[-1]
+            for new_rows in new_frames:
+                self._fold(new_rows)
+            return bool(new_frames)
+
+    def major_df(self):
+        """生成专业汇总表，结果与原来对全量数据 groupby 的结果一致"""
+        with self._lock:
+            if self._major_df is not None:
+                return self._major_df
+
+            # 1. 专业性别比例汇总
+            gender_counts = self.gender_counts[self.gender_counts.sum(axis=1) > 0]
+            gender_ratio = gender_counts.div(gender_counts.sum(axis=1), axis=0)
+            if "男" not in gender_ratio.columns: gender_ratio["男"] = 0.0
+            if "女" not in gender_ratio.columns: gender_ratio["女"] = 0.0
+            gender_ratio = gender_ratio.rename(columns={"男": "男生比例", "女": "女生比例"})
+
+            # 2. 专业学习指标汇总（累加和 / 非空个数 = 平均值）
+            major_agg = self.metric_sums / self.metric_counts.where(self.metric_counts > 0)
+
+            major_df = gender_ratio.join(major_agg, how="inner").sort_index()
+            major_df.index.name = "专业"
+            major_df.columns.name = None
+            self._major_df = major_df.reset_index().rename(columns=RENAME_COLS)
+            return self._major_df
+
+    def distribution_rows(self):
+        """返回已累加的所有行（快照加上之后追加的行）中计算分布摘要用到的列"""
+        with self._lock:
+            if not self.distribution_frames:
+                return pd.DataFrame(columns=DISTRIBUTION_COLS)
+            return pd.concat(self.distribution_frames, ignore_index=True)
+
+
+def major_distributions(df, bins=20, pass_score=60):
+    """
+    预先计算每个专业的分布摘要，图表只需要这些数字，不需要把原始数据发送给浏览器
+    - 期末考试分数：等宽分箱的直方图计数（所有专业共用同一组分箱边界，便于对比）
+    - 每周学习时长：四分位数、须线位置（1.5倍四分位距以内的最小/最大值）和均值
+    - 通过率：期末考试分数 >= pass_score 的比例
+    :return: {专业: 摘要字典}，分箱边界放在 "score_edges" 中
+    """
+    df = df[df["专业"].notna()]
+    score_col, hours_col = "期末考试分数", "每周学习时长（小时）"
+    # 专业编码：category 类型的列直接使用已有的编码，不需要逐行比较字符串
+    major_codes, majors = pd.factorize(df["专业"], sort=True)
+    majors = np.asarray(majors)
+
+    # 1. 期末考试分数直方图：一次 bincount 算出所有专业所有分箱的计数
+    score_mask = df[score_col].notna().to_numpy()
+    score_values = df[score_col].to_numpy(dtype=np.float64)[score_mask]
+    low, high = np.floor(score_values.min()), np.ceil(score_values.max())
+    edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+    bin_index = np.clip(np.searchsorted(edges, score_values, side="right") - 1, 0, bins - 1)
+    hist_counts = np.bincount(
+        major_codes[score_mask] * bins + bin_index, minlength=len(majors) * bins
+    ).reshape(len(majors), bins)
+
+    # 2. 通过率（分数缺失的学生按未通过计算）
+    pass_rate = pd.Series(df[score_col].to_numpy() >= pass_score).groupby(major_codes).mean()
+
+    # 3. 每周学习时长箱线图需要的统计量（按专业编码分组）
+    hours_mask = df[hours_col].notna().to_numpy()
+    hours = pd.Series(df[hours_col].to_numpy(dtype=np.float64)[hours_mask])
+    hours_codes = major_codes[hours_mask]
+    grouped = hours.groupby(hours_codes)
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    quartiles.columns = ["q1", "median", "q3"]
+    iqr = quartiles["q3"] - quartiles["q1"]
+    # 须线：1.5倍四分位距范围内的最小值和最大值
+    lower_bound = (quartiles["q1"] - 1.5 * iqr).reindex(range(len(majors))).to_numpy()[hours_codes]
+    upper_bound = (quartiles["q3"] + 1.5 * iqr).reindex(range(len(majors))).to_numpy()[hours_codes]
+    lower_fence = hours.where(hours >= lower_bound).groupby(hours_codes).min()
+    upper_fence = hours.where(hours <= upper_bound).groupby(hours_codes).max()
+    box_stats = quartiles.assign(
+        lowerfence=lower_fence, upperfence=upper_fence, mean=grouped.mean(), count=grouped.size()
+    )
+
+    summaries = {"score_edges": edges.tolist()}
+    for code, major in enumerate(majors):
+        summaries[major] = {
+            "score_counts": hist_counts[code].tolist(),
+            "pass_rate": float(pass_rate.get(code, np.nan)),
+            "hours_box": {key: float(value) for key, value in box_stats.loc[code].items()}
+            if code in box_stats.index else None,
+        }
+    return summaries
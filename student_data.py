@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+
+# 每个 Streamlit 进程中学生数据占用内存的预算（MB），可用环境变量 STUDENT_MEMORY_BUDGET_MB 调整
+MEMORY_BUDGET_MB = float(os.environ.get("STUDENT_MEMORY_BUDGET_MB", "64"))
+
+# 解析CSV时直接使用紧凑的数据类型：
+# 字符串列用 category（每行只存一个小整数编码），分数和比例用 float32
+STUDENT_DTYPES = {
+    "性别": "category",
+    "专业": "category",
+    "每周学习时长（小时）": "float32",
+    "上课出勤率": "float32",
+    "期中考试分数": "float32",
+    "作业完成率": "float32",
+    "期末考试分数": "float32",
+}
+
+# 数据类型变化时修改版本号，让旧的列式快照失效
+SNAPSHOT_KEY = "compact-v1"
+
+
+def read_student_csv(path):
+    """按紧凑的数据类型读取学生数据CSV"""
+    df = pd.read_csv(path, dtype=STUDENT_DTYPES)
+    if "学号" in df.columns:
+        # 学号没有缺失值时可以用 uint32 存储，比 int64 节省一半
+        df["学号"] = pd.to_numeric(df["学号"], downcast="unsigned")
+    return df
+
+
+def training_view(df):
+    """
+    训练用的数据：没有缺失值时直接复用原始数据，不再复制一份
+    （调用方只读使用，不能原地修改）
+    """
+    if not df.isna().any().any():
+        return df
+    return df.dropna()
+
+
+def frame_memory_report(frames):
+    """
+    统计各个 DataFrame 占用的内存
+    :param frames: {名称: DataFrame}
+    :return: DataFrame，列为 数据表、行数、内存(MB)、说明；同一个对象只计算一次
+    """
+    rows = []
+    seen = {}
+    for name, df in frames.items():
+        if id(df) in seen:
+            rows.append((name, len(df), 0.0, f"与{seen[id(df)]}共用同一份数据"))
+            continue
+        seen[id(df)] = name
+        memory_mb = df.memory_usage(index=True, deep=True).sum() / 1024 ** 2
+        rows.append((name, len(df), round(memory_mb, 2), ""))
+    return pd.DataFrame(rows, columns=["数据表", "行数", "内存(MB)", "说明"])
@@ -0,0 +1,129 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 每块生成的行数：随机数按块播种，行数和 seed 相同时生成的数据完全相同
+CHUNK_ROWS = 1_000_000
+
+STUDENT_MAJORS = np.array(["人工智能", "大数据管理", "工商管理", "电子商务", "财务管理"])
+
+
+def student_chunk(start, rows, seed=42):
+    """生成一块与 student_data_adjusted_rounded.csv 结构相同的学生数据"""
+    rng = np.random.default_rng([seed, start // CHUNK_ROWS])
+    hours = np.clip(rng.normal(20, 7, rows), 0, 50).round(2)
+    attendance = np.clip(rng.normal(0.8, 0.1, rows), 0.3, 1).round(2)
+    midterm = np.clip(rng.normal(72, 12, rows), 0, 100).round(2)
+    homework = np.clip(rng.normal(0.8, 0.1, rows), 0.3, 1).round(2)
+    final = 0.47 * hours + 14.75 * attendance + 14.9 * homework + 0.51 * midterm + rng.normal(0, 5, rows)
+    return pd.DataFrame({
+        "学号": np.arange(start, start + rows, dtype=np.int64) + 2023000001,
+        "性别": np.where(rng.random(rows) < 0.5, "男", "女"),
+        "专业": STUDENT_MAJORS[rng.integers(0, len(STUDENT_MAJORS), rows)],
+        "每周学习时长（小时）": hours,
+        "上课出勤率": attendance,
+        "期中考试分数": midterm,
+        "作业完成率": homework,
+        "期末考试分数": np.clip(final, 0, 100).round(2),
+    })
+
+
+INSURANCE_REGIONS = np.array(["东南部", "西南部", "东北部", "西北部"])
+
+
+def insurance_chunk(start, rows, seed=42):
+    """生成一块与 insurance-chinese.csv 结构相同的医疗费用数据"""
+    rng = np.random.default_rng([seed, start // CHUNK_ROWS])
+    age = rng.integers(18, 65, rows)
+    bmi = np.clip(rng.normal(30.7, 6.1, rows), 15, 53).round(1)
+    children = rng.choice(6, rows, p=[0.43, 0.24, 0.18, 0.12, 0.02, 0.01])
+    smoker = rng.random(rows) < 0.2
+    charges = 260 * age + 330 * bmi + 480 * children + 23800 * smoker + rng.normal(0, 4000, rows) - 12000
+    return pd.DataFrame({
+        "年龄": age,
+        "性别": np.where(rng.random(rows) < 0.5, "男性", "女性"),
+        "BMI": bmi,
+        "子女数量": children,
+        "是否吸烟": np.where(smoker, "是", "否"),
+        "区域": INSURANCE_REGIONS[rng.integers(0, len(INSURANCE_REGIONS), rows)],
+        "医疗费用": np.clip(charges, 1100, None).round(2),
+    })
+
+
+# 三种企鹅各项测量值的均值和标准差：(喙的长度, 喙的深度, 翅膀的长度, 身体质量)
+PENGUIN_SPECIES = np.array(["阿德利企鹅", "巴布亚企鹅", "帽带企鹅"])
+PENGUIN_MEANS = np.array([[38.8, 18.3, 190.0, 3700.0], [47.5, 15.0, 217.0, 5076.0], [48.8, 18.4, 196.0, 3733.0]])
+PENGUIN_STDS = np.array([[2.7, 1.2, 6.5, 460.0], [3.1, 1.0, 6.5, 500.0], [3.3, 1.1, 7.1, 380.0]])
+PENGUIN_ISLANDS = np.array(["托尔森岛", "比斯科群岛", "德里姆岛"])
+# 每种企鹅出现在各个岛屿上的概率（巴布亚企鹅只在比斯科群岛，帽带企鹅只在德里姆岛）
+PENGUIN_ISLAND_P = np.array([[0.34, 0.29, 0.37], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+
+
+def penguin_chunk(start, rows, seed=42):
+    """生成一块与 penguins-chinese.csv 结构相同的企鹅数据"""
+    rng = np.random.default_rng([seed, start // CHUNK_ROWS])
+    species = rng.choice(3, rows, p=[0.44, 0.36, 0.20])
+    measures = rng.normal(PENGUIN_MEANS[species], PENGUIN_STDS[species])
+    # 按每种企鹅的岛屿分布抽样：累计概率与均匀随机数比较
+    island = (rng.random(rows)[:, None] > PENGUIN_ISLAND_P[species].cumsum(axis=1)).sum(axis=1)
+    return pd.DataFrame({
+        "企鹅的种类": PENGUIN_SPECIES[species],
+        "企鹅栖息的岛屿": PENGUIN_ISLANDS[np.minimum(island, 2)],
+        "喙的长度": measures[:, 0].round(1),
+        "喙的深度": measures[:, 1].round(1),
+        "翅膀的长度": measures[:, 2].round(0),
+        "身体质量": measures[:, 3].round(-1),
+        "性别": np.where(rng.random(rows) < 0.5, "雄性", "雌性"),
+        "观测年份": rng.integers(2007, 2010, rows),
+    })
+
+
+def write_chunked_csv(path, rows, make_chunk, seed=42, encoding="utf-8"):
+    """
+    按块生成数据并写入CSV，内存占用与总行数无关
+    文件已存在时直接复用（同样的参数生成的数据完全相同）
+    """
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding=encoding, newline="") as f:
+        for start in range(0, rows, CHUNK_ROWS):
+            chunk = make_chunk(start, min(CHUNK_ROWS, rows - start), seed)
+            chunk.to_csv(f, index=False, header=(start == 0))
+    os.replace(tmp_path, path)
+    return path
+
+
+def student_csv_path(rows, data_dir=".bench_data", seed=42):
+    return os.path.join(data_dir, f"student_{rows}_seed{seed}.csv")
+
+
+def student_csv(rows, data_dir=".bench_data", seed=42):
+    """生成（或复用）指定行数的学生数据CSV，返回文件路径"""
+    return write_chunked_csv(student_csv_path(rows, data_dir, seed), rows, student_chunk, seed)
+
+
+def insurance_csv(rows, data_dir=".bench_data", seed=42):
+    """生成（或复用）指定行数的医疗费用数据CSV（与原始数据一样使用gbk编码），返回文件路径"""
+    path = os.path.join(data_dir, f"insurance_{rows}_seed{seed}.csv")
+    return write_chunked_csv(path, rows, insurance_chunk, seed, encoding="gbk")
+
+
+def penguin_csv(rows, data_dir=".bench_data", seed=42):
+    """生成（或复用）指定行数的企鹅数据CSV（与原始数据一样使用gbk编码），返回文件路径"""
+    path = os.path.join(data_dir, f"penguins_{rows}_seed{seed}.csv")
+    return write_chunked_csv(path, rows, penguin_chunk, seed, encoding="gbk")
+
+
+DATASETS = {"student": student_csv, "insurance": insurance_csv, "penguins": penguin_csv}
+
+
+if __name__ == "__main__":
+    # 生成合成数据：python synthetic_data.py 行数 [输出目录] [数据集：student/insurance/penguins]
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data_dir = sys.argv[2] if len(sys.argv) > 2 else ".bench_data"
+    dataset = sys.argv[3] if len(sys.argv) > 3 else "student"
+    print(DATASETS[dataset](rows, data_dir))
@@ -0,0 +1,62 @@
+import os
+
+# 解析一批新追加的行时视为“数据格式错误”的异常（字段数不对、数值无法转换、缺少字段、JSON 格式错误等）
+PARSE_ERRORS = (ValueError, KeyError, TypeError)
+
+
+def read_complete_lines(path, offset):
+    """
+    读取文件中 offset 之后追加的完整行，最后一行如果还没写完留到下次再读
+    :return: 字节串（没有新的完整行时为空）；文件变小（被重写）时返回 None
+    """
+    size = os.path.getsize(path)
+    if size < offset:
+        return None
+    if size == offset:
+        return b""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    return data[:data.rfind(b"\n") + 1]
+
+
+def split_header(data):
+    """拆出第一行（CSV表头），返回 (列名列表, 表头的字节数)"""
+    header = data[:data.find(b"\n") + 1]
+    return header.decode("utf-8").strip().split(","), len(header)
+
+
+def check_field_count(data, n_fields):
+    """
+    检查每一行的字段数（数据中没有带引号的逗号）：逗号总数必须等于 (字段数 - 1) × 行数，
+    pd.read_csv 会用空值补齐字段不够的行，只检查结果的列数发现不了这样的行
+    """
+    lines = data.count(b"\n")
+    if data.count(b",") != (n_fields - 1) * lines:
+        raise ValueError(f"有的行字段数不是 {n_fields}")
+
+
+def parse_lines(data, parse):
+    """
+    解析一批完整行；整批解析失败时把行对半拆开分别解析，找出并跳过无法解析的行，
+    一行错误的数据不会挡住之后追加的数据
+    :param parse: 解析函数，接收字节串返回 DataFrame，数据格式错误时抛出 PARSE_ERRORS 中的异常
+    :return: (解析成功的 DataFrame 列表, 跳过的行列表)
+    """
+    frames, bad_lines = [], []
+    pending = [[line for line in data.splitlines(keepends=True) if line.strip()]]
+    while pending:
+        lines = pending.pop()
+        if not lines:
+            continue
+        try:
+            frames.append(parse(b"".join(lines)))
+        except PARSE_ERRORS:
+            if len(lines) == 1:
+                bad_lines.append(lines[0].decode("utf-8", errors="replace").strip())
+            else:
+                middle = len(lines) // 2
+                # 先处理前一半，保持数据的先后顺序
+                pending.append(lines[middle:])
+                pending.append(lines[:middle])
+    return frames, bad_lines
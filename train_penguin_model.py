@@ -0,0 +1,125 @@
+import json
+import os
+import pickle
+import sys
+
+import pandas as pd
+
+from atomic_io import write_atomic
+from feature_encoder import FeatureEncoder
+from forest_compiler import compile_forest, sha256_file
+
+# 训练数据和生成的文件
+DATA_FILE = "penguins-chinese.csv"
+MODEL_FILE = "rfc_model.pkl"
+UNIQUES_FILE = "output_uniques.pkl"
+COMPILED_FILE = "rfc_model.forest"
+MANIFEST_FILE = "rfc_model.manifest.json"
+
+TARGET_COL = "企鹅的种类"
+# 数值特征在前，岛屿和性别在后，独热编码后的列顺序与 streamlit_predict_v2.py 一致
+FEATURE_COLS = ["喙的长度", "喙的深度", "翅膀的长度", "身体质量", "企鹅栖息的岛屿", "性别"]
+
+# 固定随机种子：同样的数据和参数每次训练得到完全相同的模型
+PARAMS = {
+    "n_estimators": 100,
+    "train_size": 0.8,
+    "random_state": 42,
+}
+
+
+def artifact_files(paths):
+    """生成的文件列表，目录（编译后的模型）展开为其中的每个文件"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+        else:
+            files.append(path)
+    return files
+
+
+def training_key(data_path):
+    """决定训练结果的全部输入：数据内容、参数和 scikit-learn 版本"""
+    import sklearn
+
+    return {
+        "data_sha256": sha256_file(data_path),
+        "params": PARAMS,
+        "sklearn_version": sklearn.__version__,
+    }
+
+
+def is_up_to_date(key):
+    """上次训练的输入与本次相同，并且生成的文件都没有被改动过"""
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest["key"] == key and all(
+            sha256_file(path) == digest for path, digest in manifest["artifacts"].items()
+        )
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+def train(data_path):
+    """训练企鹅分类模型，返回 (模型, 物种名称, 测试集准确率)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+
+    # 读取数据集，并将字符编码指定为gbk，防止中文报错
+    penguin_df = pd.read_csv(data_path, encoding="gbk")
+    # 删除缺失值所在的行
+    penguin_df = penguin_df.dropna()
+
+    # 物种名称编码为 0、1、2...，名称按首次出现的顺序保存到 output_uniques.pkl
+    output_codes, output_uniques = pd.factorize(penguin_df[TARGET_COL])
+
+    # 岛屿和性别独热编码，结果与 pd.get_dummies 相同
+    features = penguin_df[FEATURE_COLS]
+    encoder = FeatureEncoder.fit(features)
+    features = pd.DataFrame(encoder.transform(features), columns=encoder.feature_names)
+
+    x_train, x_test, y_train, y_test = train_test_split(
+        features, output_codes, train_size=PARAMS["train_size"], random_state=PARAMS["random_state"]
+    )
+    # 使用全部CPU核心训练；随机种子固定，结果与核心数无关
+    rfc = RandomForestClassifier(
+        n_estimators=PARAMS["n_estimators"], random_state=PARAMS["random_state"], n_jobs=-1
+    )
+    rfc.fit(x_train, y_train)
+    accuracy = accuracy_score(y_test, rfc.predict(x_test))
+    # 保存的模型不带 n_jobs，应用端逐条预测时不启动线程池
+    rfc.n_jobs = None
+    return rfc, output_uniques, accuracy
+
+
+if __name__ == "__main__":
+    # 训练企鹅分类模型：python train_penguin_model.py [数据csv] [--force]
+    args = [arg for arg in sys.argv[1:] if arg != "--force"]
+    data_path = args[0] if args else DATA_FILE
+
+    key = training_key(data_path)
+    if "--force" not in sys.argv and is_up_to_date(key):
+        print(f"数据和参数都没有变化，跳过训练（{MANIFEST_FILE}）")
+        exit(0)
+
+    rfc, output_uniques, accuracy = train(data_path)
+    print(f"模型在测试集上的准确率为: {accuracy:.4f}")
+
+    write_atomic(MODEL_FILE, pickle.dumps(rfc))
+    write_atomic(UNIQUES_FILE, pickle.dumps(output_uniques))
+    compile_forest(rfc).save(COMPILED_FILE, source_sha256=sha256_file(MODEL_FILE))
+
+    manifest = {
+        "key": key,
+        "accuracy": round(accuracy, 4),
+        "artifacts": {
+            path: sha256_file(path) for path in artifact_files([MODEL_FILE, UNIQUES_FILE, COMPILED_FILE])
+        },
+    }
+    write_atomic(MANIFEST_FILE, json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+    for path, digest in manifest["artifacts"].items():
+        print(f"{path}  sha256={digest}")
+    print(f"保存成功，训练记录写入 {MANIFEST_FILE}")